@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+公共定义 - 各入口（CLI、Web 服务）和核心模块共用
+
+只依赖标准库（orjson 可选），CLI 不加载整个 core 包也能导入：
+- core 包内: from .common import ...
+- 把 core 目录加入 sys.path 后: from common import ...
+"""
+
+import os
+import sys
+import json
+import shutil
+import subprocess
+from pathlib import Path
+from typing import Dict
+
+# 可选: orjson 解析/序列化 JSON
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    orjson = None
+    HAS_ORJSON = False
+
+# 高频创建的数据类用 __slots__ 缩小实例；dataclass 的 slots 参数需要 Python 3.10+
+DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+# 配置路径 -> (mtime_ns, 解析后的配置文件内容)
+_CONFIG_CACHE: Dict[str, tuple] = {}
+
+
+def read_config_file(path: str) -> Dict:
+    """读取并解析 JSON 配置；文件未修改时直接返回上次的解析结果（共享对象，只读）"""
+    mtime = os.stat(path).st_mtime_ns
+    cached = _CONFIG_CACHE.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    raw = Path(path).read_bytes()
+    data = orjson.loads(raw) if HAS_ORJSON else json.loads(raw.decode('utf-8'))
+    _CONFIG_CACHE[path] = (mtime, data)
+    return data
+
+
+def shell_open(target: str):
+    """用系统关联程序打开应用/文件/网址，不经过 cmd.exe 解析；打不开时抛出 OSError"""
+    if hasattr(os, 'startfile'):
+        try:
+            os.startfile(target)
+            return
+        except OSError:
+            # ShellExecute 找不到的（如 PATH 中的 .cmd 脚本）按 PATH 解析后直接启动
+            resolved = shutil.which(target)
+            if resolved is None:
+                raise
+            subprocess.Popen([resolved], close_fds=True)
+            return
+    if '://' in target:
+        import webbrowser  # 只在打开网址时导入
+        if not webbrowser.open(target):
+            raise OSError(f'没有可用的浏览器: {target}')
+    else:
+        subprocess.Popen([target], close_fds=True)
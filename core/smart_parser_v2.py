@@ -29,6 +29,12 @@ except Exception as e:
     HAS_LLM = False
     print(f"[Warn] LLM not available: {e}")
 
+try:
+    from .common import DATACLASS_SLOTS
+except ImportError:
+    # 作为顶层模块加载时（core 目录在 sys.path 中）
+    from common import DATACLASS_SLOTS
+
 
 class ActionType(Enum):
     """动作类型"""
@@ -69,7 +75,7 @@ class ParsedIntent:
     suggested_mode: ExecutionMode
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class Action:
     """动作"""
     type: ActionType
@@ -851,6 +857,43 @@ class SmartParserV2:
         self.save_learning_data()
 
 
+# msedge.exe 路径，首次打开网址时查找并缓存；'' 表示没找到
+_edge_path: Optional[str] = None
+
+
+def _find_edge() -> Optional[str]:
+    """查找 msedge.exe（PATH 或默认安装目录），找不到返回 None"""
+    import shutil
+    
+    found = shutil.which('msedge')
+    if found:
+        return found
+    for base in ('ProgramFiles(x86)', 'ProgramFiles', 'LOCALAPPDATA'):
+        root = os.environ.get(base)
+        if root:
+            candidate = os.path.join(root, 'Microsoft', 'Edge', 'Application', 'msedge.exe')
+            if os.path.isfile(candidate):
+                return candidate
+    return None
+
+
+def open_in_edge(url: str):
+    """直接启动 Edge 打开网址，不经过 cmd.exe；找不到 msedge.exe 时退回 start 命令"""
+    import subprocess
+    global _edge_path
+    
+    if _edge_path is None:
+        _edge_path = _find_edge() or ''
+    if _edge_path:
+        subprocess.Popen(
+            [_edge_path, url],
+            creationflags=getattr(subprocess, 'DETACHED_PROCESS', 0),
+            close_fds=True,
+        )
+    else:
+        subprocess.Popen(f'start msedge "{url}"', shell=True)
+
+
 class ActionExecutorV2:
     """增强版动作执行器"""
     
@@ -1065,7 +1108,6 @@ class ActionExecutorV2:
         return result
     
     def _execute_search(self, action: Action, result: Dict) -> Dict:
-        import subprocess
         import urllib.parse
         
         query = action.params.get('query', '')
@@ -1086,7 +1128,7 @@ class ActionExecutorV2:
         else:
             url = urls.get(engine, urls['bing'])
         
-        subprocess.Popen(f'start msedge "{url}"', shell=True)
+        open_in_edge(url)
         
         result['success'] = True
         result['output'] = f"搜索: {query} ({engine})"
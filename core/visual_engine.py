@@ -20,7 +20,20 @@ from typing import List, Dict, Tuple, Optional, Any, Union
 from enum import Enum, auto
 import json
 import os
+import sys
+import time
+import hashlib
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from .common import DATACLASS_SLOTS
+except ImportError:
+    # 作为顶层模块加载时（core 目录在 sys.path 中）
+    from common import DATACLASS_SLOTS
+
+# 四个 CV 检测器并发执行：Canny/形态学/MSER 等 OpenCV 调用会释放 GIL
+_DETECT_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="visual-detect")
 
 
 class ElementType(Enum):
@@ -39,7 +52,7 @@ class ElementType(Enum):
     UNKNOWN = "unknown"         # [emoji]
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class UIElement:
     """UI [emoji]"""
     type: ElementType
@@ -145,8 +158,8 @@ class VisualEngine:
             self._init_ml_model()
 
         # [emoji]
-        self._element_cache: Optional[List[UIElement]] = None
-        self._cache_timestamp: float = 0
+        # (截图感知哈希, 检测时间, 检测结果)：同一画面在有效期内直接复用
+        self._element_cache: Optional[Tuple[bytes, float, List[UIElement]]] = None
         self._cache_duration: float = 0.5  # [emoji]
 
         print("[VisualEngine] initialized")
@@ -191,11 +204,15 @@ class VisualEngine:
         Returns:
             UIElement [emoji]
         """
-        # [emoji]
-        if isinstance(screenshot, Image.Image):
-            img = cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
-        else:
-            img = screenshot.copy()
+        # 画面与上次检测相同且未过期时直接返回上次的结果
+        key = self._screenshot_key(screenshot)
+        cached = self._element_cache
+        if cached is not None and cached[0] == key and \
+                time.monotonic() - cached[1] < self._cache_duration:
+            return list(cached[2])
+
+        # 各检测步骤只读取图像，ndarray 输入不再复制
+        img = self.to_bgr(screenshot)
 
         elements = []
 
@@ -215,38 +232,48 @@ class VisualEngine:
         # 4. [emoji]
         elements = self._filter_and_sort(elements)
 
-        return elements
+        self._element_cache = (key, time.monotonic(), elements)
+        return list(elements)
+
+    @staticmethod
+    def to_bgr(screenshot: Union[np.ndarray, Image.Image]) -> np.ndarray:
+        """PIL 截图转为 BGR 数组；同一张截图要多次检测/定位时先转换一次再传入"""
+        if isinstance(screenshot, Image.Image):
+            return cv2.cvtColor(np.asarray(screenshot), cv2.COLOR_RGB2BGR)
+        return screenshot
+
+    @staticmethod
+    def _screenshot_key(screenshot: Union[np.ndarray, Image.Image]) -> bytes:
+        """截图的感知哈希：缩成 32x32 灰度图后取摘要，画面不变时结果相同"""
+        if isinstance(screenshot, Image.Image):
+            data = screenshot.convert('L').resize((32, 32)).tobytes()
+        else:
+            gray = screenshot if screenshot.ndim == 2 else cv2.cvtColor(screenshot, cv2.COLOR_BGR2GRAY)
+            data = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).tobytes()
+        return hashlib.blake2b(data, digest_size=16).digest()
 
     def _detect_with_cv(self, img: np.ndarray) -> List[UIElement]:
         """[emoji]"""
         elements = []
-        height, width = img.shape[:2]
-
-        # 1. [emoji]
-        buttons = self._detect_buttons(img)
-        elements.extend(buttons)
 
-        # 2. [emoji]
-        inputs = self._detect_inputs(img)
-        elements.extend(inputs)
+        # 灰度图只转换一次，各检测器共用
+        gray = img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
 
-        # 3. [emoji]
-        icons = self._detect_icons(img)
-        elements.extend(icons)
-
-        # 4. [emoji]
-        texts = self._detect_text_regions(img)
-        elements.extend(texts)
+        # 按钮、输入框、图标、文本区域，结果按此顺序合并
+        futures = [
+            _DETECT_POOL.submit(detector, gray)
+            for detector in (self._detect_buttons, self._detect_inputs,
+                             self._detect_icons, self._detect_text_regions)
+        ]
+        for future in futures:
+            elements.extend(future.result())
 
         return elements
 
-    def _detect_buttons(self, img: np.ndarray) -> List[UIElement]:
+    def _detect_buttons(self, gray: np.ndarray) -> List[UIElement]:
         """[emoji]"""
         elements = []
 
-        # [emoji]
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-
         # [emoji]
         edges = cv2.Canny(gray, 50, 150)
         contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
@@ -282,12 +309,10 @@ class VisualEngine:
 
         return elements
 
-    def _detect_inputs(self, img: np.ndarray) -> List[UIElement]:
+    def _detect_inputs(self, gray: np.ndarray) -> List[UIElement]:
         """[emoji]"""
         elements = []
 
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-
         # [emoji]
         horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (25, 1))
         horizontal = cv2.morphologyEx(gray, cv2.MORPH_OPEN, horizontal_kernel)
@@ -315,12 +340,10 @@ class VisualEngine:
 
         return elements
 
-    def _detect_icons(self, img: np.ndarray) -> List[UIElement]:
+    def _detect_icons(self, gray: np.ndarray) -> List[UIElement]:
         """[emoji]"""
         elements = []
 
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-
         # [emoji]
         edges = cv2.Canny(gray, 100, 200)
         contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
@@ -345,12 +368,10 @@ class VisualEngine:
 
         return elements
 
-    def _detect_text_regions(self, img: np.ndarray) -> List[UIElement]:
+    def _detect_text_regions(self, gray: np.ndarray) -> List[UIElement]:
         """[emoji] MSER[emoji]"""
         elements = []
 
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-
         # MSER [emoji]
         mser = cv2.MSER_create()
         regions, _ = mser.detectRegions(gray)
@@ -417,22 +438,37 @@ class VisualEngine:
 
     def _filter_and_sort(self, elements: List[UIElement]) -> List[UIElement]:
         """[emoji]"""
-        # [emoji]
-        filtered = []
+        # 去掉重叠超过 50% 的元素，保留置信度高的
+        # boxes/areas 与 filtered 一一对应，每个元素与已保留的全部边框一次算出 IoU
+        filtered: List[UIElement] = []
+        boxes = np.empty((len(elements), 4))
+        areas = np.empty(len(elements))
         for elem in elements:
-            overlap = False
-            for existing in filtered:
-                # [emoji] IoU
-                iou = self._calculate_iou(elem.bbox, existing.bbox)
-                if iou > 0.5:  # [emoji] 50%
-                    overlap = True
-                    # [emoji]
-                    if elem.confidence > existing.confidence:
-                        filtered.remove(existing)
+            box = elem.bbox
+            area = (box[2] - box[0]) * (box[3] - box[1])
+            count = len(filtered)
+            if count:
+                kept = boxes[:count]
+                inter_w = np.minimum(kept[:, 2], box[2]) - np.maximum(kept[:, 0], box[0])
+                inter_h = np.minimum(kept[:, 3], box[3]) - np.maximum(kept[:, 1], box[1])
+                inter = np.maximum(inter_w, 0) * np.maximum(inter_h, 0)
+                union = areas[:count] + area - inter
+                iou = np.divide(inter, union, out=np.zeros(count), where=union > 0)
+                overlaps = np.flatnonzero(iou > 0.5)
+                if overlaps.size:
+                    i = overlaps[0]
+                    # 置信度更高时替换已保留的元素，新元素排到末尾
+                    if elem.confidence > filtered[i].confidence:
+                        del filtered[i]
+                        boxes[i:count - 1] = boxes[i + 1:count]
+                        areas[i:count - 1] = areas[i + 1:count]
                         filtered.append(elem)
-                    break
-            if not overlap:
-                filtered.append(elem)
+                        boxes[count - 1] = box
+                        areas[count - 1] = area
+                    continue
+            boxes[count] = box
+            areas[count] = area
+            filtered.append(elem)
 
         # [emoji]
         filtered.sort(key=lambda x: x.confidence, reverse=True)
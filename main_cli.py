@@ -7,15 +7,28 @@ GodHand CLI - 简单可用的命令行版本
 
 import sys
 import os
+import json
+import atexit
+import heapq
 import subprocess
 import time
 import re
-from typing import List, Dict, Optional, Tuple
+import random
+import threading
+from datetime import datetime, timedelta
+from urllib.parse import quote
+from typing import List, Dict, Optional, Tuple, NamedTuple
 from dataclasses import dataclass
 from enum import Enum
+from functools import lru_cache
+from contextlib import contextmanager
 
 # 添加核心模块路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'core'))
+
+from common import shell_open
+import win_input  # Windows 下用 SendInput 批量发送键鼠事件
 
 # 尝试导入 pyautogui
 try:
@@ -28,9 +41,75 @@ except ImportError:
     print("[WARN] pyautogui 未安装，GUI功能不可用")
     print("  安装: pip install pyautogui pyperclip")
 
+# Windows 专用模块
+try:
+    import winsound
+except ImportError:
+    winsound = None
+
+if sys.platform == 'win32':
+    import ctypes
+    _MessageBoxW = ctypes.windll.user32.MessageBoxW
+    _MessageBoxW.argtypes = (ctypes.c_void_p, ctypes.c_wchar_p, ctypes.c_wchar_p, ctypes.c_uint)
+    _MessageBoxW.restype = ctypes.c_int
+else:
+    _MessageBoxW = None
+
+# 可选: mss 截图（直接 BitBlt 到内存，不经过 PIL）
+try:
+    import mss
+    import mss.tools
+    HAS_MSS = True
+except ImportError:
+    HAS_MSS = False
+
+# 可选: OpenCV 灰度模板匹配（配合 mss 截图）
+try:
+    import cv2
+    import numpy as np
+    HAS_CV2 = True
+except ImportError:
+    HAS_CV2 = False
+
+# 可选: RE2 正则引擎（google-re2），用于总正则的线性时间匹配
+try:
+    import re2
+    HAS_RE2 = True
+except ImportError:
+    HAS_RE2 = False
+
+# 可选: Aho-Corasick 多关键词扫描（未安装时退回正则实现）
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
 
-class ActionType(Enum):
-    """动作类型"""
+# 可选: readline 行编辑与历史（Windows 上通常没有）
+try:
+    import readline
+    HAS_READLINE = True
+except ImportError:
+    HAS_READLINE = False
+
+# 可选: orjson 序列化（录制日志逐行写入）
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# 复用的 JSON 编码器：配置文件保持缩进便于手工编辑，录制日志用紧凑格式
+_PRETTY_JSON = json.JSONEncoder(ensure_ascii=False, indent=2).encode
+if HAS_ORJSON:
+    def _compact_json(obj) -> str:
+        return orjson.dumps(obj).decode('utf-8')
+else:
+    _compact_json = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+
+
+class ActionType(str, Enum):
+    """动作类型（str 子类，成员可直接当字符串使用）"""
     OPEN_APP = "open_app"
     CLOSE_APP = "close_app"  # 关闭应用
     ACTIVATE_WINDOW = "activate_window"  # 激活窗口
@@ -79,63 +158,227 @@ class Action:
     description: str = ""
 
 
+class _Rule(NamedTuple):
+    """一条单一指令识别规则"""
+    name: str
+    pattern: str
+    # 触发关键词：正则能匹配的指令中必然出现其中之一，关键词扫描据此筛掉不可能命中的规则
+    keywords: Tuple[str, ...]
+    # 关键词同时是开头动词，可走前缀快速路径
+    verb: bool = False
+    # 无参数规则的 (动作类型, 描述)：正则就是关键词本身，命中关键词即可构造动作
+    paramless: Optional[Tuple[ActionType, str]] = None
+
+
+# 单一指令识别规则（按优先级排列）。规则名与 SimpleParser._rule_<规则名> 一一对应；
+# 捕获组统一以规则名为前缀，避免合并后重名。
+# 参数两端的空白和引号由正则本身去掉，处理函数直接使用捕获组；
+# 参数可以只有引号（如 输入""），捕获为空串，由处理函数视为解析失败。
+# 修改正则时同步修改同一行的关键词，下面的前缀表、关键词表、无参数表都由此生成
+_PARSE_RULES: List[_Rule] = [
+    _Rule('open_app', r'(?:打开|启动|运行)\s*(?P<open_app_arg>.+)', ('打开', '启动', '运行'), verb=True),
+    _Rule('click', r'(?:点击|单击).*?(?P<click_x>\d+)\s*,\s*(?P<click_y>\d+)', ('点击', '单击'), verb=True),
+    _Rule('double_click', r'双击', ('双击',), paramless=(ActionType.DOUBLE_CLICK, '双击鼠标')),
+    _Rule('right_click', r'右键', ('右键',), paramless=(ActionType.RIGHT_CLICK, '右键点击')),
+    _Rule('type', r'(?:输入|打字)\s*["\']*(?P<type_arg>.*?)["\']*\s*$', ('输入', '打字'), verb=True),
+    _Rule('press_key', r'(?:按|按键)\s*(?P<press_key_arg>.+)', ('按',), verb=True),
+    _Rule('hotkey', r'(?:快捷键)\s*(?P<hotkey_arg>.+)', ('快捷键',), verb=True),
+    _Rule('wait', r'(?:等待|延时)\s*(?P<wait_arg>\d+)', ('等待', '延时'), verb=True),
+    _Rule('screenshot', r'截图', ('截图',), paramless=(ActionType.SCREENSHOT, '截图')),
+    _Rule('move', r'(?:移动|移到).*?(?P<move_x>\d+)\s*,\s*(?P<move_y>\d+)', ('移动', '移到'), verb=True),
+    _Rule('search', r'(?:搜索|查找|百度|google)\s*(?P<search_arg>.+)', ('搜索', '查找', '百度', 'google'), verb=True),
+    # 创建目录优先于文件，避免"创建文件夹"被文件匹配
+    _Rule('dir_create', r'(?:创建|新建).*?(?:文件夹|目录)\s*["\']*(?P<dir_create_arg>.*?)["\']*\s*$', ('创建', '新建')),
+    _Rule('file_create', r'(?:创建|新建).*?文件\s*["\']*(?P<file_create_arg>.*?)["\']*\s*$', ('创建', '新建')),
+    _Rule('file_delete', r'(?:删除|移除).*?文件\s*["\']*(?P<file_delete_arg>.*?)["\']*\s*$', ('删除', '移除')),
+    _Rule('browser_open', r'(?:打开|访问).*?(?P<browser_open_arg>https?://\S+)', ('打开', '访问')),
+    _Rule('close_app', r'(?:关闭|退出|关掉)\s*(?P<close_app_arg>.+)', ('关闭', '退出', '关掉'), verb=True),
+    _Rule('copy', r'(?:复制|拷贝)', ('复制', '拷贝'), paramless=(ActionType.COPY, '复制')),
+    _Rule('paste', r'(?:粘贴)', ('粘贴',), paramless=(ActionType.PASTE, '粘贴')),
+    _Rule('select_all', r'(?:全选)', ('全选',), paramless=(ActionType.SELECT_ALL, '全选')),
+    _Rule('get_position', r'(?:获取|显示).*?(?:鼠标|光标).*?(?:位置|坐标)', ('获取', '显示')),
+    _Rule('image_click', r'(?:点击图片|找图).*?\s*(?P<image_click_arg>\S.*\.(?:png|jpg|bmp|gif))', ('点击图片', '找图')),
+    _Rule('loop', r'(?:循环|重复)\s*(?P<loop_count>\d+)\s*(?:次)?\s*(?P<loop_arg>.+)', ('循环', '重复'), verb=True),
+    _Rule('wait_for_image', r'(?:等待|等).*?(?:图片|图像).*?\s*(?P<wait_for_image_arg>\S.*\.(?:png|jpg|bmp|gif))', ('等',)),
+    _Rule('activate_window', r'(?:激活|切换到|点击窗口)\s*(?P<activate_window_arg>.+)', ('激活', '切换到', '点击窗口'), verb=True),
+    _Rule('list_windows', r'(?:列出|显示).*?(?:窗口|应用|程序)', ('列出', '显示')),
+    _Rule('minimize_window', r'(?:最小化|最小)', ('最小',), paramless=(ActionType.MINIMIZE_WINDOW, '最小化窗口')),
+    _Rule('maximize_window', r'(?:最大化|最大)', ('最大',), paramless=(ActionType.MAXIMIZE_WINDOW, '最大化窗口')),
+    _Rule('get_screen_size', r'(?:获取|显示).*?(?:屏幕|分辨率)', ('获取', '显示')),
+    _Rule('get_pixel_color', r'(?:获取|查看).*?(?:颜色|像素).*?(?P<get_pixel_color_x>\d+)\s*,\s*(?P<get_pixel_color_y>\d+)', ('获取', '查看')),
+    _Rule('random_click', r'(?:随机点击|随便点)', ('随机点击', '随便点'), paramless=(ActionType.RANDOM_CLICK, '随机点击')),
+    _Rule('beep', r'(?:蜂鸣|提示音|beep)', ('蜂鸣', '提示音', 'beep'), paramless=(ActionType.BEEP, '蜂鸣提示')),
+    _Rule('notify', r'(?:通知|提醒)\s*(?P<notify_arg>.+)', ('通知', '提醒'), verb=True),
+]
+
+# 所有规则合并为一个总正则：每个分支以 .*? 开头并用 match 锚定在行首，
+# 这样分支按列表顺序尝试，保持原先逐条 re.search 的优先级语义。
+# 指令不做整体小写化，google/beep/png 等 ASCII 关键词靠 IGNORECASE 匹配。
+# 装有 google-re2 时用 RE2 编译（同样是最左优先的分支语义），否则用标准库 re；
+# 大小写标志写成内联 (?i)，两个引擎都认
+_MASTER_RE = (re2 if HAS_RE2 else re).compile('(?i)' + '|'.join(
+    f'(?P<{rule.name}>.*?{rule.pattern})' for rule in _PARSE_RULES
+))
+
+# 每条规则单独编译一份，供前缀快速路径直接使用
+_RULE_RES = {rule.name: re.compile(rule.pattern, re.IGNORECASE) for rule in _PARSE_RULES}
+
+# 指令开头的动词 -> 规则名。同一动词属于多条规则时取优先级最高的
+_PREFIX_TABLE: Dict[str, str] = {}
+for _rule in _PARSE_RULES:
+    if _rule.verb:
+        for _keyword in _rule.keywords:
+            _PREFIX_TABLE.setdefault(_keyword, _rule.name)
+_PREFIX_LENGTHS = sorted({len(prefix) for prefix in _PREFIX_TABLE}, reverse=True)
+
+# 无参数规则: 规则名 -> (动作类型, 描述)
+_PARAMLESS_RULES: Dict[str, Tuple[ActionType, str]] = {
+    rule.name: rule.paramless for rule in _PARSE_RULES if rule.paramless
+}
+
+# 规则优先级（在 _PARSE_RULES 中的位置）
+_RULE_PRIORITY = {rule.name: i for i, rule in enumerate(_PARSE_RULES)}
+
+# 规则名 -> 触发关键词
+_RULE_KEYWORDS: Dict[str, Tuple[str, ...]] = {rule.name: rule.keywords for rule in _PARSE_RULES}
+
+
+class _KeywordScanner:
+    """多关键词扫描器 - 一次遍历指令，得到所有命中关键词对应的标签集合"""
+
+    def __init__(self, keyword_tags: Dict[str, Tuple[str, ...]]):
+        tags_by_keyword: Dict[str, set] = {}
+        for tag, keywords in keyword_tags.items():
+            for keyword in keywords:
+                tags_by_keyword.setdefault(keyword.lower(), set()).add(tag)
+
+        if HAS_AHOCORASICK:
+            self._automaton = ahocorasick.Automaton()
+            for keyword, tags in tags_by_keyword.items():
+                self._automaton.add_word(keyword, frozenset(tags))
+            self._automaton.make_automaton()
+        else:
+            self._automaton = None
+            # 同一位置只会报告最长的关键词，把它的前缀关键词的标签也并入
+            self._tags = {
+                keyword: frozenset().union(*(
+                    other_tags for other, other_tags in tags_by_keyword.items()
+                    if keyword.startswith(other)
+                ))
+                for keyword in tags_by_keyword
+            }
+            alternation = '|'.join(
+                re.escape(keyword) for keyword in sorted(tags_by_keyword, key=len, reverse=True)
+            )
+            self._regex = re.compile(f'(?=({alternation}))', re.IGNORECASE)
+
+    def scan(self, text: str) -> set:
+        """返回 text 中命中的所有标签"""
+        hits = set()
+        if self._automaton is not None:
+            for _, tags in self._automaton.iter(text.lower()):
+                hits |= tags
+        else:
+            tags = self._tags
+            for match in self._regex.finditer(text):
+                hits |= tags[match.group(1).lower()]
+        return hits
+
+
+_KEYWORD_SCANNER = _KeywordScanner(_RULE_KEYWORDS)
+
+# 复合指令的连接词
+_RE_THEN = re.compile(r'然后|再|接着')
+_RE_OPEN_THEN = re.compile(r'(?:打开|启动|运行)\s*(.+?)\s*(?:然后|再|接着)\s*(.+)')
+
+
+def _split_then(text: str) -> List[str]:
+    """按连接词切分复合指令，一次 finditer 扫描，返回去掉空白后的非空片段"""
+    parts = []
+    last = 0
+    for match in _RE_THEN.finditer(text):
+        part = text[last:match.start()].strip()
+        if part:
+            parts.append(part)
+        last = match.end()
+    part = text[last:].strip()
+    if part:
+        parts.append(part)
+    return parts
+
+
+# 常用应用名称 -> 启动命令（键统一为小写，与解析时的小写名直接比较）
+_APP_MAP: Dict[str, str] = {
+    '计算器': 'calc.exe',
+    '记事本': 'notepad.exe',
+    '画图': 'mspaint.exe',
+    'cmd': 'cmd.exe',
+    '命令行': 'cmd.exe',
+    'powershell': 'powershell.exe',
+    '浏览器': 'msedge',
+    'edge': 'msedge',
+    'chrome': 'chrome',
+    '任务管理器': 'taskmgr.exe',
+    '设置': 'ms-settings:',
+    'word': 'winword',
+    'excel': 'excel',
+    'vscode': 'code',
+}
+
+# 中文按键名称映射
+_KEY_MAP: Dict[str, str] = {k.lower(): v for k, v in {
+    # 计算器专用
+    '加号': '+',
+    '加': '+',
+    '减号': '-',
+    '减': '-',
+    '乘号': '*',
+    '乘': '*',
+    '除号': '/',
+    '除': '/',
+    '等于': '=',
+    '等号': '=',
+    '等': '=',
+    '点': '.',
+    '小数点': '.',
+    # 功能键
+    '回车': 'enter',
+    '空格': 'space',
+    '退格': 'backspace',
+    '删除': 'delete',
+    '删除键': 'delete',
+    '上': 'up',
+    '下': 'down',
+    '左': 'left',
+    '右': 'right',
+    'ESC': 'esc',
+    'Tab': 'tab',
+    # 数字
+    '零': '0', '一': '1', '二': '2', '三': '3', '四': '4',
+    '五': '5', '六': '6', '七': '7', '八': '8', '九': '9',
+}.items()}
+
+
 class SimpleParser:
     """简化版指令解析器"""
 
     def __init__(self):
-        self.app_map = {
-            '计算器': 'calc.exe',
-            '记事本': 'notepad.exe',
-            '画图': 'mspaint.exe',
-            'cmd': 'cmd.exe',
-            '命令行': 'cmd.exe',
-            'powershell': 'powershell.exe',
-            '浏览器': 'msedge',
-            'edge': 'msedge',
-            'chrome': 'chrome',
-            '任务管理器': 'taskmgr.exe',
-            '设置': 'ms-settings:',
-            'word': 'winword',
-            'excel': 'excel',
-            'vscode': 'code',
-        }
-
-        # 中文按键名称映射
-        self.key_map = {
-            # 计算器专用
-            '加号': '+',
-            '加': '+',
-            '减号': '-',
-            '减': '-',
-            '乘号': '*',
-            '乘': '*',
-            '除号': '/',
-            '除': '/',
-            '等于': '=',
-            '等号': '=',
-            '等': '=',
-            '点': '.',
-            '小数点': '.',
-            # 功能键
-            '回车': 'enter',
-            '空格': 'space',
-            '退格': 'backspace',
-            '删除': 'delete',
-            '删除键': 'delete',
-            '上': 'up',
-            '下': 'down',
-            '左': 'left',
-            '右': 'right',
-            'ESC': 'esc',
-            'Tab': 'tab',
-            # 数字
-            '零': '0', '一': '1', '二': '2', '三': '3', '四': '4',
-            '五': '5', '六': '6', '七': '7', '八': '8', '九': '9',
+        self.app_map = dict(_APP_MAP)
+        # 每个实例独立缓存应用名解析结果，app_map 变化时需清空
+        self._resolve_app = lru_cache(maxsize=256)(self._lookup_app)
+        # 循环子命令的解析结果缓存（命令 -> Action，结果只读共享），app_map 变化时需清空
+        self.parse_command = lru_cache(maxsize=256)(self._parse_single)
+        self.key_map = _KEY_MAP
+
+        # 规则名 -> 构造 Action 的处理函数
+        self._rule_handlers = {
+            name: getattr(self, f'_rule_{name}')
+            for name in _RULE_PRIORITY if name not in _PARAMLESS_RULES
         }
 
     def parse(self, instruction: str) -> List[Action]:
         """解析指令"""
-        instruction = instruction.strip().lower()
+        instruction = instruction.strip()
         if not instruction:
             return []
 
@@ -152,10 +395,10 @@ class SimpleParser:
         actions = []
 
         # 先检查是否是\"打开XX 然后...\"模式
-        open_match = re.search(r'^(?:打开|启动|运行)\s*(.+?)\s*(?:然后|再|接着)\s*(.+)', instruction)
+        open_match = _RE_OPEN_THEN.match(instruction)
         if open_match:
             app_name = open_match.group(1).strip()
-            rest = open_match.group(2).strip()
+            rest = open_match.group(2)
 
             # 添加打开应用动作
             actions.append(Action(
@@ -170,359 +413,265 @@ class SimpleParser:
                 params={'seconds': 2.0},
                 description='等待2秒'
             ))
-
-            # 处理剩余部分（可能还有多个\"然后\"）
-            parts = re.split(r'(?:然后|再|接着)', rest)
-            for part in parts:
-                part = part.strip()
-                if not part:
-                    continue
-
-                action = self._parse_single(part)
-                if action:
-                    actions.append(action)
-                else:
-                    # 如果无法解析，作为视觉描述动作
-                    actions.append(Action(
-                        type=ActionType.VISUAL_ACTION,
-                        params={'description': part},
-                        description=f'视觉动作: {part}'
-                    ))
-
-            return actions
-
-        # 其他复合指令（没有\"打开\"开头的）
-        if '然后' in instruction or '再' in instruction:
-            parts = re.split(r'(?:然后|再|接着)', instruction)
-            for part in parts:
-                part = part.strip()
-                if not part:
-                    continue
-
-                action = self._parse_single(part)
-                if action:
-                    actions.append(action)
-                else:
-                    actions.append(Action(
-                        type=ActionType.VISUAL_ACTION,
-                        params={'description': part},
-                        description=f'视觉动作: {part}'
-                    ))
-            return actions
-
-        return []
+        else:
+            # 其他复合指令（没有\"打开\"开头的）
+            rest = instruction
+
+        # 处理剩余部分（可能还有多个\"然后\"）
+        for part in _split_then(rest):
+            action = self._parse_single(part)
+            if action:
+                actions.append(action)
+            else:
+                # 如果无法解析，作为视觉描述动作
+                actions.append(Action(
+                    type=ActionType.VISUAL_ACTION,
+                    params={'description': part},
+                    description=f'视觉动作: {part}'
+                ))
+        return actions
 
     def _parse_single(self, instruction: str) -> Optional[Action]:
-        """解析单一指令"""
-
-        # 打开应用
-        match = re.search(r'(?:打开|启动|运行)\s*(.+)', instruction)
-        if match:
-            app = match.group(1).strip()
-            return Action(
-                type=ActionType.OPEN_APP,
-                params={'app': self._resolve_app(app)},
-                description=f'打开 {app}'
-            )
-
-        # 点击坐标
-        match = re.search(r'(?:点击|单击).*?(\d+)\s*,\s*(\d+)', instruction)
-        if match:
-            x, y = int(match.group(1)), int(match.group(2))
-            return Action(
-                type=ActionType.CLICK,
-                params={'x': x, 'y': y},
-                description=f'点击 ({x}, {y})'
-            )
+        """解析单一指令 - 先扫描关键词确定候选规则，开头动词正好属于最高优先级候选时直接匹配该规则，否则匹配总正则"""
+        # 不含任何规则的触发关键词时直接放弃，省去整轮正则匹配
+        hits = _KEYWORD_SCANNER.scan(instruction)
+        if not hits:
+            return None
+
+        # 优先级最高的候选规则若是无参数规则，更高优先级的规则都不可能命中，直接返回
+        first = min(hits, key=_RULE_PRIORITY.__getitem__)
+        if first in _PARAMLESS_RULES:
+            return self._paramless_action(first)
+
+        # 开头动词查表。只有动词所属规则就是最高优先级候选时才能跳过总正则，
+        # 否则（如 "按钮点击 100,200" 含更靠前的点击规则）仍按优先级匹配
+        for length in _PREFIX_LENGTHS:
+            name = _PREFIX_TABLE.get(instruction[:length])
+            if name:
+                if name == first:
+                    match = _RULE_RES[name].match(instruction)
+                    if match:
+                        return self._rule_handlers[name](match)
+                break
 
-        # 双击
-        if '双击' in instruction:
-            return Action(
-                type=ActionType.DOUBLE_CLICK,
-                params={},
-                description='双击鼠标'
-            )
+        match = _MASTER_RE.match(instruction)
+        if not match:
+            return None
+        name = match.lastgroup
+        if name in _PARAMLESS_RULES:
+            return self._paramless_action(name)
+        return self._rule_handlers[name](match)
+
+    def _paramless_action(self, name: str) -> Action:
+        """构造无参数动作"""
+        action_type, description = _PARAMLESS_RULES[name]
+        return Action(type=action_type, params={}, description=description)
+
+    def _rule_open_app(self, m) -> Action:
+        app = m.group('open_app_arg').strip()
+        return Action(
+            type=ActionType.OPEN_APP,
+            params={'app': self._resolve_app(app)},
+            description=f'打开 {app}'
+        )
 
-        # 右键
-        if '右键' in instruction:
-            return Action(
-                type=ActionType.RIGHT_CLICK,
-                params={},
-                description='右键点击'
-            )
+    def _rule_click(self, m) -> Action:
+        x, y = int(m.group('click_x')), int(m.group('click_y'))
+        return Action(
+            type=ActionType.CLICK,
+            params={'x': x, 'y': y},
+            description=f'点击 ({x}, {y})'
+        )
 
-        # 输入文字
-        match = re.search(r'(?:输入|打字)\s*(.+)', instruction)
-        if match:
-            text = match.group(1).strip().strip('"\'')
-            return Action(
-                type=ActionType.TYPE,
-                params={'text': text},
-                description=f'输入 "{text}"'
-            )
+    def _rule_type(self, m) -> Optional[Action]:
+        text = m.group('type_arg')
+        if not text:
+            return None
+        return Action(
+            type=ActionType.TYPE,
+            params={'text': text},
+            description=f'输入 "{text}"'
+        )
 
-        # 按键
-        match = re.search(r'(?:按|按键)\s*(.+)', instruction)
-        if match:
-            key = match.group(1).strip()
-            # 使用 key_map 映射中文按键名称
-            actual_key = self.key_map.get(key, key.lower())
-            return Action(
-                type=ActionType.PRESS_KEY,
-                params={'key': actual_key},
-                description=f'按 {key}'
-            )
+    def _rule_press_key(self, m) -> Action:
+        key = m.group('press_key_arg').strip()
+        # 使用 key_map 映射中文按键名称（key_map 的键已预先转为小写）
+        key_lower = key.lower()
+        actual_key = self.key_map.get(key_lower, key_lower)
+        return Action(
+            type=ActionType.PRESS_KEY,
+            params={'key': actual_key},
+            description=f'按 {key}'
+        )
 
-        # 快捷键
-        match = re.search(r'(?:快捷键)\s*(.+)', instruction)
-        if match:
-            keys = match.group(1).strip().split('+')
-            return Action(
-                type=ActionType.HOTKEY,
-                params={'keys': [k.strip() for k in keys]},
-                description=f'快捷键 {"+".join(keys)}'
-            )
+    def _rule_hotkey(self, m) -> Action:
+        keys = m.group('hotkey_arg').strip().split('+')
+        return Action(
+            type=ActionType.HOTKEY,
+            params={'keys': [k.strip().lower() for k in keys]},
+            description=f'快捷键 {"+".join(keys)}'
+        )
 
-        # 等待
-        match = re.search(r'(?:等待|延时)\s*(\d+)', instruction)
-        if match:
-            seconds = int(match.group(1))
-            return Action(
-                type=ActionType.WAIT,
-                params={'seconds': seconds},
-                description=f'等待 {seconds} 秒'
-            )
+    def _rule_wait(self, m) -> Action:
+        seconds = int(m.group('wait_arg'))
+        return Action(
+            type=ActionType.WAIT,
+            params={'seconds': seconds},
+            description=f'等待 {seconds} 秒'
+        )
 
-        # 截图
-        if '截图' in instruction:
-            return Action(
-                type=ActionType.SCREENSHOT,
-                params={},
-                description='截图'
-            )
+    def _rule_move(self, m) -> Action:
+        x, y = int(m.group('move_x')), int(m.group('move_y'))
+        return Action(
+            type=ActionType.MOVE,
+            params={'x': x, 'y': y},
+            description=f'移动鼠标到 ({x}, {y})'
+        )
 
-        # 移动鼠标
-        match = re.search(r'(?:移动|移到).*?(\d+)\s*,\s*(\d+)', instruction)
-        if match:
-            x, y = int(match.group(1)), int(match.group(2))
-            return Action(
-                type=ActionType.MOVE,
-                params={'x': x, 'y': y},
-                description=f'移动鼠标到 ({x}, {y})'
-            )
+    def _rule_search(self, m) -> Action:
+        query = m.group('search_arg').strip()
+        return Action(
+            type=ActionType.SEARCH,
+            params={'query': query},
+            description=f'搜索: {query}'
+        )
 
-        # 搜索 - 打开浏览器搜索
-        search_match = re.search(r'(?:搜索|查找|百度|google)\s*(.+)', instruction)
-        if search_match:
-            query = search_match.group(1).strip()
-            return Action(
-                type=ActionType.SEARCH,
-                params={'query': query},
-                description=f'搜索: {query}'
-            )
+    def _rule_dir_create(self, m) -> Optional[Action]:
+        path = m.group('dir_create_arg')
+        if not path:
+            return None
+        return Action(
+            type=ActionType.DIR_CREATE,
+            params={'path': path},
+            description=f'创建目录: {path}'
+        )
 
-        # 创建目录 (优先于文件，避免"创建文件夹"被文件匹配)
-        dir_match = re.search(r'(?:创建|新建).*?(?:文件夹|目录)\s*(.+)', instruction)
-        if dir_match:
-            path = dir_match.group(1).strip().strip('"\'')
-            return Action(
-                type=ActionType.DIR_CREATE,
-                params={'path': path},
-                description=f'创建目录: {path}'
-            )
+    def _rule_file_create(self, m) -> Optional[Action]:
+        path = m.group('file_create_arg')
+        if not path:
+            return None
+        return Action(
+            type=ActionType.FILE_CREATE,
+            params={'path': path},
+            description=f'创建文件: {path}'
+        )
 
-        # 创建文件
-        file_match = re.search(r'(?:创建|新建).*?文件\s*(.+)', instruction)
-        if file_match:
-            path = file_match.group(1).strip().strip('"\'')
-            return Action(
-                type=ActionType.FILE_CREATE,
-                params={'path': path},
-                description=f'创建文件: {path}'
-            )
+    def _rule_file_delete(self, m) -> Optional[Action]:
+        path = m.group('file_delete_arg')
+        if not path:
+            return None
+        return Action(
+            type=ActionType.FILE_DELETE,
+            params={'path': path},
+            description=f'删除文件: {path}'
+        )
 
-        # 删除文件
-        del_match = re.search(r'(?:删除|移除).*?文件\s*(.+)', instruction)
-        if del_match:
-            path = del_match.group(1).strip().strip('"\'')
-            return Action(
-                type=ActionType.FILE_DELETE,
-                params={'path': path},
-                description=f'删除文件: {path}'
-            )
+    def _rule_browser_open(self, m) -> Action:
+        url = m.group('browser_open_arg')
+        return Action(
+            type=ActionType.BROWSER_OPEN,
+            params={'url': url},
+            description=f'打开网页: {url}'
+        )
 
-        # 打开网页
-        url_match = re.search(r'(?:打开|访问).*?(https?://\S+)', instruction)
-        if url_match:
-            url = url_match.group(1)
-            return Action(
-                type=ActionType.BROWSER_OPEN,
-                params={'url': url},
-                description=f'打开网页: {url}'
-            )
+    def _rule_close_app(self, m) -> Action:
+        app = m.group('close_app_arg').strip()
+        return Action(
+            type=ActionType.CLOSE_APP,
+            params={'app': app},
+            description=f'关闭应用: {app}'
+        )
 
-        # 关闭应用
-        close_match = re.search(r'(?:关闭|退出|关掉)\s*(.+)', instruction)
-        if close_match:
-            app = close_match.group(1).strip()
-            return Action(
-                type=ActionType.CLOSE_APP,
-                params={'app': app},
-                description=f'关闭应用: {app}'
-            )
+    def _rule_get_position(self, m) -> Action:
+        return Action(type=ActionType.GET_POSITION, params={}, description='获取鼠标位置')
 
-        # 复制
-        if re.search(r'(?:复制|拷贝)', instruction):
-            return Action(
-                type=ActionType.COPY,
-                params={},
-                description='复制'
-            )
+    def _rule_image_click(self, m) -> Action:
+        image_path = m.group('image_click_arg')
+        return Action(
+            type=ActionType.IMAGE_CLICK,
+            params={'image': image_path},
+            description=f'点击图片: {image_path}'
+        )
 
-        # 粘贴
-        if re.search(r'(?:粘贴)', instruction):
-            return Action(
-                type=ActionType.PASTE,
-                params={},
-                description='粘贴'
-            )
+    def _rule_loop(self, m) -> Action:
+        count = int(m.group('loop_count'))
+        sub_command = m.group('loop_arg').strip()
+        return Action(
+            type=ActionType.LOOP,
+            params={'count': count, 'command': sub_command},
+            description=f'循环{count}次: {sub_command}'
+        )
 
-        # 全选
-        if re.search(r'(?:全选)', instruction):
-            return Action(
-                type=ActionType.SELECT_ALL,
-                params={},
-                description='全选'
-            )
+    def _rule_wait_for_image(self, m) -> Action:
+        image_path = m.group('wait_for_image_arg')
+        return Action(
+            type=ActionType.WAIT_FOR_IMAGE,
+            params={'image': image_path, 'timeout': 30},
+            description=f'等待图片: {image_path}'
+        )
 
-        # 获取鼠标位置
-        if re.search(r'(?:获取|显示).*?(?:鼠标|光标).*?(?:位置|坐标)', instruction):
-            return Action(
-                type=ActionType.GET_POSITION,
-                params={},
-                description='获取鼠标位置'
-            )
+    def _rule_activate_window(self, m) -> Action:
+        window_title = m.group('activate_window_arg').strip()
+        return Action(
+            type=ActionType.ACTIVATE_WINDOW,
+            params={'title': window_title},
+            description=f'激活窗口: {window_title}'
+        )
 
-        # 图片识别点击
-        img_match = re.search(r'(?:点击图片|找图).*?(.+\.(?:png|jpg|bmp|gif))', instruction)
-        if img_match:
-            image_path = img_match.group(1).strip()
-            return Action(
-                type=ActionType.IMAGE_CLICK,
-                params={'image': image_path},
-                description=f'点击图片: {image_path}'
-            )
+    def _rule_list_windows(self, m) -> Action:
+        return Action(type=ActionType.LIST_WINDOWS, params={}, description='列出所有窗口')
 
-        # 循环执行
-        loop_match = re.search(r'(?:循环|重复)\s*(\d+)\s*(?:次)?\s*(.+)', instruction)
-        if loop_match:
-            count = int(loop_match.group(1))
-            sub_command = loop_match.group(2).strip()
-            return Action(
-                type=ActionType.LOOP,
-                params={'count': count, 'command': sub_command},
-                description=f'循环{count}次: {sub_command}'
-            )
+    def _rule_get_screen_size(self, m) -> Action:
+        return Action(type=ActionType.GET_SCREEN_SIZE, params={}, description='获取屏幕尺寸')
 
-        # 等待图片出现
-        wait_img_match = re.search(r'(?:等待|等).*?(?:图片|图像).*?(.+\.(?:png|jpg|bmp|gif))', instruction)
-        if wait_img_match:
-            image_path = wait_img_match.group(1).strip()
-            return Action(
-                type=ActionType.WAIT_FOR_IMAGE,
-                params={'image': image_path, 'timeout': 30},
-                description=f'等待图片: {image_path}'
-            )
+    def _rule_get_pixel_color(self, m) -> Action:
+        x, y = int(m.group('get_pixel_color_x')), int(m.group('get_pixel_color_y'))
+        return Action(
+            type=ActionType.GET_PIXEL_COLOR,
+            params={'x': x, 'y': y},
+            description=f'获取 ({x}, {y}) 像素颜色'
+        )
 
-        # 激活窗口
-        activate_match = re.search(r'(?:激活|切换到|点击窗口)\s*(.+)', instruction)
-        if activate_match:
-            window_title = activate_match.group(1).strip()
-            return Action(
-                type=ActionType.ACTIVATE_WINDOW,
-                params={'title': window_title},
-                description=f'激活窗口: {window_title}'
-            )
+    def _rule_notify(self, m) -> Action:
+        message = m.group('notify_arg').strip()
+        return Action(
+            type=ActionType.NOTIFY,
+            params={'message': message},
+            description=f'系统通知: {message}'
+        )
 
-        # 列出所有窗口
-        if re.search(r'(?:列出|显示).*?(?:窗口|应用|程序)', instruction):
-            return Action(
-                type=ActionType.LIST_WINDOWS,
-                params={},
-                description='列出所有窗口'
-            )
+    def add_aliases(self, aliases: Dict[str, str]):
+        """添加应用别名"""
+        self.app_map.update((name.lower(), cmd) for name, cmd in aliases.items())
+        self._resolve_app.cache_clear()
+        self.parse_command.cache_clear()
 
-        # 最小化窗口
-        if re.search(r'(?:最小化|最小)', instruction):
-            return Action(
-                type=ActionType.MINIMIZE_WINDOW,
-                params={},
-                description='最小化窗口'
-            )
+    def _lookup_app(self, app_name: str) -> str:
+        """解析应用名称（经 self._resolve_app 缓存后调用）"""
+        app_lower = app_name.lower()
+        cmd = self.app_map.get(app_lower)
+        if cmd is not None:
+            return cmd
+        return next(
+            (cmd for name, cmd in self.app_map.items() if name in app_lower or app_lower in name),
+            app_name
+        )
 
-        # 最大化窗口
-        if re.search(r'(?:最大化|最大)', instruction):
-            return Action(
-                type=ActionType.MAXIMIZE_WINDOW,
-                params={},
-                description='最大化窗口'
-            )
 
-        # 获取屏幕尺寸
-        if re.search(r'(?:获取|显示).*?(?:屏幕|分辨率)', instruction):
-            return Action(
-                type=ActionType.GET_SCREEN_SIZE,
-                params={},
-                description='获取屏幕尺寸'
-            )
+# 不依赖 pyautogui 即可执行的动作
+_NO_GUI_ACTIONS = frozenset({ActionType.OPEN_APP, ActionType.SHELL})
 
-        # 获取像素颜色
-        pixel_match = re.search(r'(?:获取|查看).*?(?:颜色|像素).*?(\d+)\s*,\s*(\d+)', instruction)
-        if pixel_match:
-            x, y = int(pixel_match.group(1)), int(pixel_match.group(2))
-            return Action(
-                type=ActionType.GET_PIXEL_COLOR,
-                params={'x': x, 'y': y},
-                description=f'获取 ({x}, {y}) 像素颜色'
-            )
+# 可交给 taskkill 的进程名（字母数字、中文、下划线、点和连字符）
+_RE_PROCESS_NAME = re.compile(r'^[\w.-]+$')
 
-        # 随机点击
-        if re.search(r'(?:随机点击|随便点)', instruction):
-            return Action(
-                type=ActionType.RANDOM_CLICK,
-                params={},
-                description='随机点击'
-            )
+# 子进程不弹出控制台窗口（仅 Windows 有此标志）
+_CREATE_NO_WINDOW = getattr(subprocess, 'CREATE_NO_WINDOW', 0)
 
-        # 蜂鸣提示
-        if re.search(r'(?:蜂鸣|提示音|beep)', instruction):
-            return Action(
-                type=ActionType.BEEP,
-                params={},
-                description='蜂鸣提示'
-            )
+# 窗口枚举结果的缓存时间（秒）
+_WINDOW_CACHE_TTL = 0.1
 
-        # 系统通知
-        notify_match = re.search(r'(?:通知|提醒)\s*(.+)', instruction)
-        if notify_match:
-            message = notify_match.group(1).strip()
-            return Action(
-                type=ActionType.NOTIFY,
-                params={'message': message},
-                description=f'系统通知: {message}'
-            )
-
-        return None
-
-    def _resolve_app(self, app_name: str) -> str:
-        """解析应用名称"""
-        app_lower = app_name.lower()
-        if app_lower in self.app_map:
-            return self.app_map[app_lower]
-        for name, cmd in self.app_map.items():
-            if name in app_lower or app_lower in name:
-                return cmd
-        return app_name
+# 短于该长度的文本以 Unicode 字符事件直接输入，更长的文本走剪贴板
+_DIRECT_TYPE_MAX_LEN = 32
 
 
 class ActionExecutor:
@@ -530,54 +679,97 @@ class ActionExecutor:
 
     def __init__(self):
         self.results = []
-
-    def execute(self, action: Action, retry=3) -> Dict:
-        """执行单个动作，带重试机制"""
-        if not HAS_PYAUTOGUI and action.type not in [ActionType.OPEN_APP, ActionType.SHELL]:
+        # 动作类型 -> 处理函数，一次性绑定，避免每次执行时拼接方法名再 getattr
+        self._handlers = {
+            action_type: getattr(self, '_exec_' + action_type)
+            for action_type in ActionType
+            if hasattr(self, '_exec_' + action_type)
+        }
+        self._gw = None  # pygetwindow，首次使用时导入
+        self._win_cache = (0.0, [])  # (枚举时间, 窗口列表)
+        self._local = threading.local()  # mss 实例不能跨线程使用，按线程缓存
+        # 终端下逐行打印进度；输出被重定向时先缓存，批量执行结束后一次写出
+        self.verbose = sys.stdout.isatty()
+        self._pending_output = []
+        self._batching = False
+
+    def _log(self, message: str):
+        """输出进度信息"""
+        if self.verbose:
+            print(message)
+        else:
+            self._pending_output.append(message)
+
+    def _flush_log(self):
+        """写出缓存的进度信息"""
+        if self._pending_output:
+            sys.stdout.write('\n'.join(self._pending_output) + '\n')
+            self._pending_output.clear()
+
+    def execute(self, action: Action, retry=3, quiet=False) -> Dict:
+        """执行单个动作，带重试机制；quiet=True 时不输出进度（用于循环内部）"""
+        result = self._execute(action, retry, quiet)
+        if not self._batching:
+            self._flush_log()
+        return result
+
+    def _execute(self, action: Action, retry: int, quiet: bool) -> Dict:
+        if not HAS_PYAUTOGUI and action.type not in _NO_GUI_ACTIONS:
             return {'success': False, 'error': 'pyautogui 未安装'}
 
-        print(f"  [执行] {action.description}")
+        if not quiet:
+            self._log(f"  [执行] {action.description}")
 
         last_error = None
         for attempt in range(retry):
             try:
-                handler = getattr(self, f'_exec_{action.type.value}', None)
+                handler = self._handlers.get(action.type)
                 if handler:
                     result = handler(action)
                     if result.get('success'):
                         return result
                     elif attempt < retry - 1:
-                        print(f"    [重试 {attempt + 1}/{retry}]...")
+                        if not quiet:
+                            self._log(f"    [重试 {attempt + 1}/{retry}]...")
                         time.sleep(0.5)
                     else:
                         return result
                 else:
-                    return {'success': False, 'error': f'未知动作: {action.type.value}'}
+                    return {'success': False, 'error': '未知动作: ' + action.type}
             except Exception as e:
                 last_error = str(e)
                 if attempt < retry - 1:
-                    print(f"    [重试 {attempt + 1}/{retry}]...")
+                    if not quiet:
+                        self._log(f"    [重试 {attempt + 1}/{retry}]...")
                     time.sleep(0.5)
 
         return {'success': False, 'error': last_error}
 
-    def execute_batch(self, actions: List[Action]) -> List[Dict]:
-        """批量执行动作"""
+    def execute_batch(self, actions: List[Action]) -> Tuple[List[Dict], int]:
+        """批量执行动作，返回 (结果列表, 成功数)"""
         results = []
-        for i, action in enumerate(actions, 1):
-            print(f"\n[{i}/{len(actions)}] {action.description}")
-            result = self.execute(action)
-            results.append(result)
-            if not result.get('success'):
-                print(f"  [FAIL] {result.get('error')}")
-            else:
-                print(f"  [OK] {result.get('output', '完成')}")
-        return results
+        success_count = 0
+        total = len(actions)
+        self._batching = True
+        try:
+            for i, action in enumerate(actions, 1):
+                self._log(f"\n[{i}/{total}] {action.description}")
+                result = self.execute(action)
+                results.append(result)
+                if not result.get('success'):
+                    self._log(f"  [FAIL] {result.get('error')}")
+                else:
+                    success_count += 1
+                    self._log(f"  [OK] {result.get('output', '完成')}")
+        finally:
+            self._batching = False
+            self._flush_log()
+        return results, success_count
 
     def _exec_open_app(self, action: Action) -> Dict:
         """打开应用"""
         app = action.params.get('app', '')
-        subprocess.Popen(f'start "" {app}', shell=True)
+        shell_open(app)
         return {'success': True, 'output': f'已启动: {app}'}
 
     def _exec_click(self, action: Action) -> Dict:
@@ -585,39 +777,51 @@ class ActionExecutor:
         x = action.params.get('x')
         y = action.params.get('y')
         if x is not None and y is not None:
-            pyautogui.click(x, y)
+            if not win_input.click(x, y):
+                pyautogui.click(x, y)
             return {'success': True, 'output': f'点击 ({x}, {y})'}
         else:
-            pyautogui.click()
+            if not win_input.click():
+                pyautogui.click()
             return {'success': True, 'output': '点击当前位置'}
 
     def _exec_double_click(self, action: Action) -> Dict:
         """双击"""
-        pyautogui.doubleClick()
+        if not win_input.click(clicks=2):
+            pyautogui.doubleClick()
         return {'success': True, 'output': '双击'}
 
     def _exec_right_click(self, action: Action) -> Dict:
         """右键点击"""
-        pyautogui.rightClick()
+        if not win_input.click(button='right'):
+            pyautogui.rightClick()
         return {'success': True, 'output': '右键点击'}
 
     def _exec_type(self, action: Action) -> Dict:
         """输入文字"""
         text = action.params.get('text', '')
-        pyperclip.copy(text)
-        pyautogui.hotkey('ctrl', 'v')
+        # 短文本直接发送字符事件，不占用剪贴板，也不经过输入法
+        # （pyautogui.write 发的是普通按键，中文输入法会把 "hello" 变成拼音组字）
+        if len(text) >= _DIRECT_TYPE_MAX_LEN or not win_input.type_text(text):
+            # 长文本或非 Windows 走剪贴板粘贴。Ctrl+V 是异步处理的，无法确定目标程序
+            # 何时读完剪贴板，所以不恢复原有内容，避免粘贴出旧内容
+            pyperclip.copy(text)
+            if not win_input.send_keys(('ctrl', 'v')):
+                pyautogui.hotkey('ctrl', 'v')
         return {'success': True, 'output': f'输入: {text[:30]}'}
 
     def _exec_press_key(self, action: Action) -> Dict:
         """按键"""
         key = action.params.get('key', '')
-        pyautogui.press(key)
+        if not win_input.press(key):
+            pyautogui.press(key)
         return {'success': True, 'output': f'按键: {key}'}
 
     def _exec_hotkey(self, action: Action) -> Dict:
         """快捷键"""
         keys = action.params.get('keys', [])
-        pyautogui.hotkey(*keys)
+        if not win_input.send_keys(keys):
+            pyautogui.hotkey(*keys)
         return {'success': True, 'output': f'快捷键: {"+".join(keys)}'}
 
     def _exec_move(self, action: Action) -> Dict:
@@ -635,8 +839,6 @@ class ActionExecutor:
 
     def _exec_screenshot(self, action: Action) -> Dict:
         """截图"""
-        from datetime import datetime
-
         # 使用配置的截图目录
         screenshot_dir = "."
         if hasattr(self, 'config'):
@@ -645,9 +847,21 @@ class ActionExecutor:
         filename = f"screenshot_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
         filepath = os.path.join(screenshot_dir, filename)
 
-        pyautogui.screenshot(filepath)
+        if HAS_MSS:
+            sct = self._get_sct()
+            img = sct.grab(sct.monitors[1])
+            mss.tools.to_png(img.rgb, img.size, output=filepath)
+        else:
+            pyautogui.screenshot(filepath)
         return {'success': True, 'output': f'截图保存: {filepath}'}
 
+    def _get_sct(self):
+        """获取当前线程复用的 mss 截图实例"""
+        sct = getattr(self._local, 'sct', None)
+        if sct is None:
+            sct = self._local.sct = mss.mss()
+        return sct
+
     def _exec_visual_action(self, action: Action) -> Dict:
         """视觉描述动作 - 尝试模拟执行"""
         description = action.params.get('description', '')
@@ -677,7 +891,6 @@ class ActionExecutor:
             # 提取要输入的文本
             text = description.replace('输入', '').strip()
             if text:
-                import pyperclip
                 pyperclip.copy(text)
                 pyautogui.hotkey('ctrl', 'v')
                 return {'success': True, 'output': f'输入文本: {text}'}
@@ -687,10 +900,9 @@ class ActionExecutor:
     def _exec_search(self, action: Action) -> Dict:
         """搜索 - 打开浏览器"""
         query = action.params.get('query', '')
-        import urllib.parse
-        encoded_query = urllib.parse.quote(query)
+        encoded_query = quote(query)
         url = f'https://www.bing.com/search?q={encoded_query}'
-        subprocess.Popen(f'start msedge "{url}"', shell=True)
+        shell_open(url)
         return {'success': True, 'output': f'搜索: {query}'}
 
     def _exec_file_create(self, action: Action) -> Dict:
@@ -724,15 +936,24 @@ class ActionExecutor:
     def _exec_browser_open(self, action: Action) -> Dict:
         """打开网页"""
         url = action.params.get('url', '')
-        subprocess.Popen(f'start msedge "{url}"', shell=True)
+        shell_open(url)
         return {'success': True, 'output': f'打开网页: {url}'}
 
     def _exec_close_app(self, action: Action) -> Dict:
         """关闭应用"""
         app = action.params.get('app', '')
+        if not _RE_PROCESS_NAME.match(app):
+            return {'success': False, 'error': f'无效的应用名: {app}'}
         try:
-            # 尝试通过 taskkill 关闭
-            subprocess.run(f'taskkill /f /im {app}.exe', shell=True, capture_output=True)
+            # 尝试通过 taskkill 关闭，输出用不到，直接丢弃
+            completed = subprocess.run(
+                ['taskkill', '/f', '/im', f'{app}.exe'],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                creationflags=_CREATE_NO_WINDOW
+            )
+            if completed.returncode != 0:
+                return {'success': False, 'error': f'关闭应用失败: {app} (taskkill 返回 {completed.returncode})'}
             return {'success': True, 'output': f'关闭应用: {app}'}
         except Exception as e:
             return {'success': False, 'error': str(e)}
@@ -761,10 +982,11 @@ class ActionExecutor:
         """图片识别点击"""
         image_path = action.params.get('image', '')
         try:
-            location = pyautogui.locateCenterOnScreen(image_path, confidence=0.9)
+            location = self._image_locator(image_path)()
             if location:
-                pyautogui.click(location.x, location.y)
-                return {'success': True, 'output': f'点击图片 {image_path} 在 ({location.x}, {location.y})'}
+                x, y = location
+                pyautogui.click(x, y)
+                return {'success': True, 'output': f'点击图片 {image_path} 在 ({x}, {y})'}
             else:
                 return {'success': False, 'error': f'未找到图片: {image_path}'}
         except Exception as e:
@@ -775,16 +997,15 @@ class ActionExecutor:
         count = action.params.get('count', 1)
         command = action.params.get('command', '')
 
+        # 子命令经解析器缓存，同一命令再次执行时无需重新解析
+        sub_action = self.parser.parse_command(command)
+        if not sub_action:
+            return {'success': False, 'error': f'无法解析: {command}'}
+
         results = []
         for i in range(count):
-            print(f"\n  [循环 {i+1}/{count}]")
-            # 解析子命令
-            sub_action = self.parser._parse_single(command.lower())
-            if sub_action:
-                result = self.execute(sub_action)
-                results.append(result)
-            else:
-                results.append({'success': False, 'error': f'无法解析: {command}'})
+            self._log(f"\n  [循环 {i+1}/{count}]")
+            results.append(self.execute(sub_action, quiet=True))
 
         success_count = sum(1 for r in results if r.get('success'))
         return {'success': success_count == len(results), 'output': f'循环完成: {success_count}/{len(results)} 成功'}
@@ -794,29 +1015,68 @@ class ActionExecutor:
         image_path = action.params.get('image', '')
         timeout = action.params.get('timeout', 30)
         try:
-            start_time = time.time()
-            while time.time() - start_time < timeout:
-                location = pyautogui.locateCenterOnScreen(image_path, confidence=0.9)
+            locate = self._image_locator(image_path)
+            deadline = time.monotonic() + timeout
+            while time.monotonic() < deadline:
+                location = locate()
                 if location:
-                    return {'success': True, 'output': f'找到图片 {image_path} 在 ({location.x}, {location.y})'}
+                    return {'success': True, 'output': f'找到图片 {image_path} 在 ({location[0]}, {location[1]})'}
                 time.sleep(0.5)
             return {'success': False, 'error': f'等待超时，未找到图片: {image_path}'}
         except Exception as e:
             return {'success': False, 'error': f'等待图片失败: {e}'}
 
+    def _image_locator(self, image_path: str, confidence: float = 0.9):
+        """返回在屏幕上查找图片的函数，找到时返回中心坐标，否则返回 None
+
+        有 OpenCV 和 mss 时，模板图只解码一次，每次调用截一帧灰度图做匹配；
+        否则退回 pyautogui 的灰度查找。
+        """
+        if HAS_CV2 and HAS_MSS:
+            needle = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+            if needle is None:
+                raise FileNotFoundError(f'无法读取图片: {image_path}')
+            return lambda: self._match_on_screen(needle, confidence)
+
+        def locate():
+            location = pyautogui.locateCenterOnScreen(image_path, confidence=confidence, grayscale=True)
+            return (location.x, location.y) if location else None
+        return locate
+
+    def _match_on_screen(self, needle, confidence: float) -> Optional[Tuple[int, int]]:
+        """截取主屏灰度图并做模板匹配"""
+        sct = self._get_sct()
+        monitor = sct.monitors[1]
+        haystack = cv2.cvtColor(np.asarray(sct.grab(monitor)), cv2.COLOR_BGRA2GRAY)
+        result = cv2.matchTemplate(haystack, needle, cv2.TM_CCOEFF_NORMED)
+        _, max_val, _, max_loc = cv2.minMaxLoc(result)
+        if max_val < confidence:
+            return None
+        height, width = needle.shape
+        return monitor['left'] + max_loc[0] + width // 2, monitor['top'] + max_loc[1] + height // 2
+
+    def _get_gw(self):
+        """延迟导入 pygetwindow 并缓存"""
+        if self._gw is None:
+            import pygetwindow
+            self._gw = pygetwindow
+        return self._gw
+
+    def _windows(self) -> List:
+        """枚举所有窗口，结果缓存 _WINDOW_CACHE_TTL 秒，循环中不必反复 EnumWindows"""
+        now = time.monotonic()
+        cached_at, windows = self._win_cache
+        if now - cached_at > _WINDOW_CACHE_TTL:
+            windows = self._get_gw().getAllWindows()
+            self._win_cache = (now, windows)
+        return windows
+
     def _exec_activate_window(self, action: Action) -> Dict:
         """激活窗口"""
         title = action.params.get('title', '')
         try:
-            import pygetwindow as gw
-            window = None
-            try:
-                window = gw.getWindowsWithTitle(title)[0]
-            except:
-                for w in gw.getAllWindows():
-                    if title.lower() in w.title.lower():
-                        window = w
-                        break
+            title_lower = title.lower()
+            window = next((w for w in self._windows() if title_lower in w.title.lower()), None)
             if window:
                 window.activate()
                 return {'success': True, 'output': f'激活窗口: {window.title}'}
@@ -828,11 +1088,10 @@ class ActionExecutor:
     def _exec_list_windows(self, action: Action) -> Dict:
         """列出所有窗口"""
         try:
-            import pygetwindow as gw
-            windows = [w for w in gw.getAllWindows() if w.title]
-            print("\n[窗口列表]")
+            windows = [w for w in self._windows() if w.title]
+            self._log("\n[窗口列表]")
             for i, w in enumerate(windows[:20], 1):
-                print(f"  {i}. {w.title}")
+                self._log(f"  {i}. {w.title}")
             return {'success': True, 'output': f'找到 {len(windows)} 个窗口'}
         except Exception as e:
             return {'success': False, 'error': f'获取窗口列表失败: {e}'}
@@ -840,8 +1099,7 @@ class ActionExecutor:
     def _exec_minimize_window(self, action: Action) -> Dict:
         """最小化窗口"""
         try:
-            import pygetwindow as gw
-            window = gw.getActiveWindow()
+            window = self._get_gw().getActiveWindow()
             if window:
                 window.minimize()
                 return {'success': True, 'output': '最小化当前窗口'}
@@ -853,8 +1111,7 @@ class ActionExecutor:
     def _exec_maximize_window(self, action: Action) -> Dict:
         """最大化窗口"""
         try:
-            import pygetwindow as gw
-            window = gw.getActiveWindow()
+            window = self._get_gw().getActiveWindow()
             if window:
                 window.maximize()
                 return {'success': True, 'output': '最大化当前窗口'}
@@ -881,7 +1138,6 @@ class ActionExecutor:
 
     def _exec_random_click(self, action: Action) -> Dict:
         """随机点击"""
-        import random
         width, height = pyautogui.size()
         x = random.randint(100, width - 100)
         y = random.randint(100, height - 100)
@@ -891,7 +1147,6 @@ class ActionExecutor:
     def _exec_beep(self, action: Action) -> Dict:
         """蜂鸣提示"""
         try:
-            import winsound
             winsound.Beep(1000, 500)
             return {'success': True, 'output': '蜂鸣提示'}
         except:
@@ -900,20 +1155,40 @@ class ActionExecutor:
     def _exec_notify(self, action: Action) -> Dict:
         """系统通知"""
         message = action.params.get('message', 'GodHand 通知')
+        if _MessageBoxW is None:
+            return {'success': False, 'error': '系统通知仅支持 Windows'}
         try:
-            from ctypes import windll
-            windll.user32.MessageBoxW(0, message, "GodHand", 0x40)
+            _MessageBoxW(None, message, "GodHand", 0x40)
             return {'success': True, 'output': f'显示通知: {message}'}
         except Exception as e:
             return {'success': False, 'error': str(e)}
 
 
+@contextmanager
+def _atomic_open(path: str):
+    """写到 path.tmp，刷盘后 os.replace 原子替换；中途出错时原文件保持不变"""
+    tmp = path + '.tmp'
+    f = open(tmp, 'w', encoding='utf-8')
+    try:
+        yield f
+        f.flush()
+        os.fsync(f.fileno())
+    except BaseException:
+        f.close()
+        os.remove(tmp)
+        raise
+    f.close()
+    os.replace(tmp, path)
+
+
 class Config:
-    """配置管理系统"""
+    """配置管理系统 - set() 只标记修改，flush() 或退出时统一写盘"""
 
     def __init__(self, config_file="godhand_config.json"):
         self.config_file = config_file
         self.data = self._load()
+        self._dirty = False
+        atexit.register(self.flush)
 
     def _load(self) -> Dict:
         """加载配置"""
@@ -935,55 +1210,94 @@ class Config:
             }
         }
 
-        if os.path.exists(self.config_file):
-            try:
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    default_config.update(json.load(f))
-            except Exception as e:
-                print(f"[WARN] 配置文件加载失败: {e}")
+        try:
+            with open(self.config_file, 'r', encoding='utf-8') as f:
+                default_config.update(json.load(f))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[WARN] 配置文件加载失败: {e}")
 
         return default_config
 
     def save(self):
         """保存配置"""
         try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, ensure_ascii=False, indent=2)
+            with _atomic_open(self.config_file) as f:
+                f.write(_PRETTY_JSON(self.data))
+            self._dirty = False
         except Exception as e:
             print(f"[ERROR] 配置保存失败: {e}")
 
+    def flush(self):
+        """有未保存的修改时写盘"""
+        if self._dirty:
+            self.save()
+
     def get(self, key, default=None):
         """获取配置项"""
         return self.data.get(key, default)
 
     def set(self, key, value):
-        """设置配置项"""
+        """设置配置项（不立即写盘；值未变化时不标记修改）"""
+        if key in self.data and self.data[key] == value:
+            return
         self.data[key] = value
-        self.save()
+        self._dirty = True
 
 
 class Logger:
     """日志系统"""
 
+    # 累计多少条日志刷一次盘（ERROR 级别立即刷盘）
+    FLUSH_EVERY = 64
+
     def __init__(self, log_file='godhand.log', enabled=True):
         self.log_file = log_file
         self.enabled = enabled
+        self._fh = None
+        self._unflushed = 0
+        self._ts_cache = (0, '')  # (整数秒, 格式化好的时间戳)
+
+    def _open(self):
+        """首次写日志时打开文件，之后一直复用同一个带缓冲的句柄"""
+        self._fh = open(self.log_file, 'a', buffering=65536, encoding='utf-8')
+        atexit.register(self.close)
+        return self._fh
 
     def log(self, level, message):
         """记录日志"""
         if not self.enabled:
             return
 
-        from datetime import datetime
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        log_entry = f"[{timestamp}] [{level}] {message}\n"
+        # 同一秒内的日志复用已格式化的时间戳
+        second = int(time.time())
+        if second != self._ts_cache[0]:
+            self._ts_cache = (second, datetime.fromtimestamp(second).strftime('%Y-%m-%d %H:%M:%S'))
+        log_entry = ''.join(('[', self._ts_cache[1], '] [', level, '] ', message, '\n'))
 
         try:
-            with open(self.log_file, 'a', encoding='utf-8') as f:
-                f.write(log_entry)
+            fh = self._fh or self._open()
+            fh.write(log_entry)
+            self._unflushed += 1
+            if self._unflushed >= self.FLUSH_EVERY or level == 'ERROR':
+                self.flush()
         except Exception as e:
             print(f"[ERROR] 日志写入失败: {e}")
 
+    def flush(self):
+        """把缓冲的日志写入磁盘"""
+        if self._fh:
+            self._fh.flush()
+        self._unflushed = 0
+
+    def close(self):
+        """刷盘并关闭日志文件"""
+        if self._fh:
+            self._fh.close()
+            self._fh = None
+        self._unflushed = 0
+
     def info(self, message):
         self.log('INFO', message)
 
@@ -995,73 +1309,155 @@ class Logger:
 
 
 class TaskScheduler:
-    """任务调度器"""
+    """任务调度器 - 按下次执行时间维护最小堆，睡到最近的任务到期"""
 
     def __init__(self):
-        self.tasks = []
+        # 任务按列存储，下标即任务 id
+        self._times: List[str] = []     # 'HH:MM'
+        self._commands: List[str] = []
+        self._hours = bytearray()
+        self._minutes = bytearray()
         self.running = False
+        self._heap = []  # [(下次执行的时间戳, 任务下标)]
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def tasks(self) -> List[Dict]:
+        """任务列表快照 [{'time': 'HH:MM', 'command': str}]"""
+        return [{'time': t, 'command': c} for t, c in zip(self._times, self._commands)]
+
+    @staticmethod
+    def _next_run(hour: int, minute: int, allow_current_minute: bool = False) -> float:
+        """计算任务下一次执行的时间戳"""
+        now = datetime.now()
+        if allow_current_minute and (now.hour, now.minute) == (hour, minute):
+            return now.timestamp()
+        run_at = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if run_at <= now:
+            run_at += timedelta(days=1)
+        return run_at.timestamp()
 
     def add(self, time_str: str, command: str):
         """添加定时任务 (time_str: HH:MM)"""
-        self.tasks.append({'time': time_str, 'command': command, 'done': False})
+        try:
+            hour, minute = (int(part) for part in time_str.split(':'))
+            if not (0 <= hour < 24 and 0 <= minute < 60):
+                raise ValueError
+        except ValueError:
+            print(f"[调度] 时间格式错误: {time_str}，应为 HH:MM")
+            return
+        with self._lock:
+            task_id = len(self._times)
+            self._times.append(time_str)
+            self._commands.append(command)
+            self._hours.append(hour)
+            self._minutes.append(minute)
+            heapq.heappush(self._heap, (self._next_run(hour, minute, allow_current_minute=True), task_id))
         print(f"[调度] 添加任务 {time_str}: {command}")
 
-    def run(self, parser, executor):
-        """运行调度器"""
-        import datetime
+    def start(self, parser, executor) -> bool:
+        """在后台线程中启动调度器；已在运行时不再启动第二个线程"""
+        if self._thread is not None and self._thread.is_alive():
+            print("[调度] 调度器已在运行")
+            return False
+        # 先复位状态再启动线程，紧随其后的 stop() 不会被线程启动时的复位覆盖
         self.running = True
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self.run, args=(parser, executor), daemon=True)
+        self._thread.start()
+        return True
+
+    def run(self, parser, executor):
+        """运行调度器（状态由 start() 复位，这里只读取）"""
         print("[调度] 任务调度器启动...")
 
         while self.running:
-            now = datetime.datetime.now().strftime('%H:%M')
-            for task in self.tasks:
-                if task['time'] == now and not task['done']:
-                    print(f"\n[调度] 执行任务: {task['command']}")
-                    actions = parser.parse(task['command'])
-                    if actions:
-                        for action in actions:
-                            executor.execute(action)
-                    task['done'] = True
+            with self._lock:
+                due = self._heap[0] if self._heap else None
+            delay = due[0] - time.time() if due else 1.0
+            if delay > 0:
+                # 可被 stop() 立即唤醒；最多等 1 秒，以便及时发现新加入的任务
+                if self._stop_event.wait(min(delay, 1.0)):
+                    break
+                continue
 
-            # 重置已完成的任务（下一分钟）
-            if now.endswith(':00'):
-                for task in self.tasks:
-                    task['done'] = False
+            with self._lock:
+                _, task_id = heapq.heappop(self._heap)
+                command = self._commands[task_id]
+                heapq.heappush(self._heap, (self._next_run(self._hours[task_id], self._minutes[task_id]), task_id))
 
-            time.sleep(1)
+            print(f"\n[调度] 执行任务: {command}")
+            actions = parser.parse(command)
+            if actions:
+                for action in actions:
+                    executor.execute(action)
 
     def stop(self):
         """停止调度器"""
         self.running = False
+        self._stop_event.set()
 
 
 class Recorder:
-    """录制和回放系统"""
+    """录制和回放系统
+
+    录制时每个动作追加一行到 NDJSON 日志（record_file + '.ndjson'），
+    定期刷盘，不在内存里积累；停止录制时再流式转换为 JSON 数组脚本。
+    """
+
+    # 累计多少个动作刷一次盘
+    FLUSH_EVERY = 32
 
     def __init__(self):
         self.recording = []
         self.is_recording = False
         self.record_file = "recorded_script.json"
+        self._fh = None
+        self._journal = None
+        self._count = 0
 
     def start_recording(self):
         """开始录制"""
+        self._close_journal()
         self.recording = []
+        self._count = 0
         self.is_recording = True
         print("[录制] 开始录制，输入 'stop' 停止")
         return True
 
+    def _open_journal(self):
+        """首个动作到来时打开日志（调用方可能在 start_recording 之后才设置 record_file）"""
+        self._journal = self.record_file + '.ndjson'
+        self._fh = open(self._journal, 'w', buffering=65536, encoding='utf-8')
+        return self._fh
+
+    def _close_journal(self):
+        if self._fh:
+            self._fh.close()
+            self._fh = None
+
     def stop_recording(self, filename=None):
         """停止录制并保存"""
         self.is_recording = False
         if filename:
             self.record_file = filename
 
-        # 保存到文件
-        import json
         try:
-            with open(self.record_file, 'w', encoding='utf-8') as f:
-                json.dump(self.recording, f, ensure_ascii=False, indent=2)
-            print(f"[录制] 已保存 {len(self.recording)} 个动作到 {self.record_file}")
+            self._close_journal()
+            # NDJSON -> JSON 数组，逐行转换
+            with _atomic_open(self.record_file) as out:
+                out.write('[')
+                if self._journal:
+                    with open(self._journal, 'r', encoding='utf-8') as journal:
+                        for i, line in enumerate(journal):
+                            out.write(',\n  ' if i else '\n  ')
+                            out.write(line.rstrip('\n'))
+                    os.remove(self._journal)
+                    self._journal = None
+                out.write('\n]\n' if self._count else ']\n')
+            print(f"[录制] 已保存 {self._count} 个动作到 {self.record_file}")
             return True
         except Exception as e:
             print(f"[ERROR] 保存失败: {e}")
@@ -1069,18 +1465,23 @@ class Recorder:
 
     def add_action(self, command: str):
         """添加动作到录制"""
-        if self.is_recording:
-            self.recording.append({
-                'command': command,
-                'timestamp': time.time()
-            })
+        if not self.is_recording:
+            return
+        try:
+            fh = self._fh or self._open_journal()
+            fh.write(_compact_json({'command': command, 'timestamp': time.time()}))
+            fh.write('\n')
+            self._count += 1
+            if self._count % self.FLUSH_EVERY == 0:
+                fh.flush()
+        except Exception as e:
+            print(f"[ERROR] 录制写入失败: {e}")
 
     def load_script(self, filename=None):
         """加载录制的脚本"""
         if filename:
             self.record_file = filename
 
-        import json
         try:
             with open(self.record_file, 'r', encoding='utf-8') as f:
                 self.recording = json.load(f)
@@ -1097,9 +1498,12 @@ class Recorder:
 
         print(f"[回放] 开始回放 {len(self.recording)} 个动作，间隔 {delay} 秒")
 
+        # 按单调时钟截止时间调度，扣除执行耗时，避免间隔累积漂移
+        total = len(self.recording)
+        deadline = time.monotonic()
         for i, item in enumerate(self.recording, 1):
             command = item['command']
-            print(f"\n[{i}/{len(self.recording)}] 执行: {command}")
+            print(f"\n[{i}/{total}] 执行: {command}")
 
             actions = parser.parse(command)
             if actions:
@@ -1108,22 +1512,125 @@ class Recorder:
             else:
                 print(f"  [ERROR] 无法解析: {command}")
 
-            if i < len(self.recording):
-                time.sleep(delay)
+            if i < total:
+                deadline += delay
+                remaining = deadline - time.monotonic()
+                if remaining > 0:
+                    time.sleep(remaining)
 
         print("\n[回放] 完成")
         return True
 
 
+# 启动和帮助信息，导入时拼好，输出时一次写出
+_STARTUP_BANNER = "\n".join([
+    "",
+    "基础指令:",
+    "  打开 [应用名]        - 打开应用程序",
+    "  关闭 [应用名]        - 关闭应用程序",
+    "  打开 XX 然后 YY      - 复合指令（支持多个然后）",
+    "  点击 X, Y           - 点击坐标",
+    "  双击                - 双击鼠标",
+    "  右键                - 右键点击",
+    "  输入 [文字]         - 输入文字",
+    "  按 [键名]           - 按键",
+    "  快捷键 ctrl+a       - 快捷键组合",
+    "  移动 X, Y           - 移动鼠标",
+    "  等待 [秒数]         - 等待",
+    "  截图                - 屏幕截图",
+    "",
+    "窗口管理:",
+    "  列出窗口            - 显示所有窗口",
+    "  激活 [窗口名]       - 激活指定窗口",
+    "  最小化              - 最小化当前窗口",
+    "  最大化              - 最大化当前窗口",
+    "",
+    "高级功能:",
+    "  搜索 [关键词]       - 浏览器搜索",
+    "  打开 [网址]         - 打开网页",
+    "  创建文件 [路径]     - 创建文件",
+    "  删除文件 [路径]     - 删除文件",
+    "  创建文件夹 [路径]   - 创建目录",
+    "  复制 / 粘贴 / 全选  - 剪贴板操作",
+    "  获取鼠标位置        - 显示当前鼠标坐标",
+    "  获取屏幕尺寸        - 显示分辨率",
+    "  获取颜色 X, Y       - 获取像素颜色",
+    "  点击图片 [路径]     - 图片识别并点击",
+    "  等待图片 [路径]     - 等待图片出现",
+    "  循环 N次 [指令]     - 重复执行指令",
+    "  随机点击            - 随机位置点击",
+    "  蜂鸣                - 播放提示音",
+    "  通知 [消息]         - 显示系统通知",
+    "",
+    "其他命令: help, exit, quit, record, play, script",
+    "=" * 60,
+]) + "\n"
+
+_HELP_BANNER = "\n".join([
+    "",
+    "=" * 60,
+    "GodHand CLI v3.2 - 使用帮助",
+    "=" * 60,
+    "",
+    "基础示例:",
+    "  打开记事本",
+    "  打开记事本 然后输入Hello World 然后按回车",
+    "  点击 500, 500",
+    "  双击",
+    "  输入 你好世界",
+    "  按 enter",
+    "  快捷键 ctrl+s",
+    "  等待 3",
+    "  截图",
+    "  获取鼠标位置",
+    "  复制 / 粘贴",
+    "  循环 3次 截图",
+    "",
+    "录制与回放:",
+    "  record            - 开始录制",
+    "  record my.json    - 录制到指定文件",
+    "  stop              - 停止录制",
+    "  play              - 回放录制",
+    "  play my.json      - 回放指定脚本",
+    "",
+    "脚本执行:",
+    "  script myscript.txt - 执行脚本文件",
+    "  (脚本文件每行一个命令，#开头为注释)",
+    "",
+    "配置管理:",
+    "  config            - 显示当前配置",
+    "  config key value  - 设置配置项",
+    "",
+    "定时任务:",
+    "  schedule HH:MM command  - 添加定时任务",
+    "  scheduler start     - 启动调度器",
+    "  scheduler stop      - 停止调度器",
+    "",
+    "高级示例:",
+    "  打开计算器 然后输入1 然后按加号 然后输入1 然后按等于",
+    "  关闭 计算器",
+    "  点击图片 button.png",
+    "  等待图片 loading.png",
+    "  列出窗口",
+    "  激活 记事本",
+    "  通知 任务完成",
+    "=" * 60,
+]) + "\n"
+
+
 class GodHandCLI:
     """GodHand 命令行界面"""
 
+    # 提示符，按是否在录制下标选择
+    _PROMPTS = ("\nGodHand> ", "\n[录制中] GodHand> ")
+
     def __init__(self):
         self.config = Config()
-        self.logger = Logger(
-            self.config.get('log_file'),
-            self.config.get('log_enabled')
-        )
+        # 启动时读取一次的配置项
+        self._log_file = self.config.get('log_file')
+        self._log_enabled = self.config.get('log_enabled')
+        self._screenshot_dir = self.config.get('screenshot_dir')
+        self.logger = Logger(self._log_file, self._log_enabled)
         self.parser = SimpleParser()
         self.executor = ActionExecutor()
         self.executor.parser = self.parser  # 用于循环执行
@@ -1132,10 +1639,27 @@ class GodHandCLI:
         self.scheduler = TaskScheduler()
         self.running = True
 
+        # 特殊命令分发表：首个单词（小写）-> 处理函数；键驻留以便按指针比较
+        commands = {
+            'exit': self._cmd_exit, 'quit': self._cmd_exit, 'q': self._cmd_exit,
+            'help': self._cmd_help, 'h': self._cmd_help, '?': self._cmd_help,
+            'record': self._cmd_record,
+            'play': self._cmd_play,
+            'script': self._cmd_script,
+            'config': self._cmd_config,
+            'schedule': self._cmd_schedule,
+            'scheduler': self._cmd_scheduler,
+        }
+        self._commands = {sys.intern(name): handler for name, handler in commands.items()}
+        # 不带参数的命令只在整行完全匹配时生效，"q 键"、"help 我打开记事本" 这类输入交给解析器
+        self._no_arg_commands = frozenset({'exit', 'quit', 'q', 'help', 'h', '?'})
+
+        if HAS_READLINE:
+            readline.parse_and_bind('tab: complete')
+
         # 确保截图目录存在
-        screenshot_dir = self.config.get('screenshot_dir')
-        if screenshot_dir and not os.path.exists(screenshot_dir):
-            os.makedirs(screenshot_dir)
+        if self._screenshot_dir:
+            os.makedirs(self._screenshot_dir, exist_ok=True)
 
         print("=" * 60)
         print("GodHand CLI v3.2 - 专业GUI自动化工具")
@@ -1144,137 +1668,38 @@ class GodHandCLI:
 
         # 加载别名
         aliases = self.config.get('aliases', {})
-        self.parser.app_map.update(aliases)
+        self.parser.add_aliases(aliases)
         if not HAS_PYAUTOGUI:
             print("\n[WARN] pyautogui 未安装，部分功能不可用")
             print("安装: pip install pyautogui pyperclip pygetwindow opencv-python\n")
-        print("\n基础指令:")
-        print("  打开 [应用名]        - 打开应用程序")
-        print("  关闭 [应用名]        - 关闭应用程序")
-        print("  打开 XX 然后 YY      - 复合指令（支持多个然后）")
-        print("  点击 X, Y           - 点击坐标")
-        print("  双击                - 双击鼠标")
-        print("  右键                - 右键点击")
-        print("  输入 [文字]         - 输入文字")
-        print("  按 [键名]           - 按键")
-        print("  快捷键 ctrl+a       - 快捷键组合")
-        print("  移动 X, Y           - 移动鼠标")
-        print("  等待 [秒数]         - 等待")
-        print("  截图                - 屏幕截图")
-        print("\n窗口管理:")
-        print("  列出窗口            - 显示所有窗口")
-        print("  激活 [窗口名]       - 激活指定窗口")
-        print("  最小化              - 最小化当前窗口")
-        print("  最大化              - 最大化当前窗口")
-        print("\n高级功能:")
-        print("  搜索 [关键词]       - 浏览器搜索")
-        print("  打开 [网址]         - 打开网页")
-        print("  创建文件 [路径]     - 创建文件")
-        print("  删除文件 [路径]     - 删除文件")
-        print("  创建文件夹 [路径]   - 创建目录")
-        print("  复制 / 粘贴 / 全选  - 剪贴板操作")
-        print("  获取鼠标位置        - 显示当前鼠标坐标")
-        print("  获取屏幕尺寸        - 显示分辨率")
-        print("  获取颜色 X, Y       - 获取像素颜色")
-        print("  点击图片 [路径]     - 图片识别并点击")
-        print("  等待图片 [路径]     - 等待图片出现")
-        print("  循环 N次 [指令]     - 重复执行指令")
-        print("  随机点击            - 随机位置点击")
-        print("  蜂鸣                - 播放提示音")
-        print("  通知 [消息]         - 显示系统通知")
-        print("\n其他命令: help, exit, quit, record, play, script")
-        print("=" * 60)
+        sys.stdout.write(_STARTUP_BANNER)
 
     def run(self):
         """运行主循环"""
         while self.running:
             try:
                 # 获取输入
-                prompt = "\n[录制中] GodHand> " if self.recorder.is_recording else "\nGodHand> "
-                user_input = input(prompt).strip()
+                user_input = input(self._PROMPTS[self.recorder.is_recording]).strip()
 
                 if not user_input:
                     continue
+                # 只切分一次：首个单词（小写后用于分发）和其余参数（保留原始大小写）
+                head, _, rest = user_input.partition(' ')
+                lhead = head.lower()
 
                 # 录制模式下，记录所有输入
                 if self.recorder.is_recording:
-                    if user_input.lower() == 'stop':
+                    if lhead == 'stop' and not rest:
                         self.recorder.stop_recording()
                         continue
                     else:
                         self.recorder.add_action(user_input)
 
-                # 处理特殊命令
-                if user_input.lower() in ['exit', 'quit', 'q']:
-                    if self.recorder.is_recording:
-                        self.recorder.stop_recording()
-                    print("再见!")
-                    break
-
-                if user_input.lower() in ['help', 'h', '?']:
-                    self.show_help()
-                    continue
-
-                # 录制命令
-                if user_input.lower() == 'record':
-                    self.recorder.start_recording()
-                    continue
-
-                if user_input.lower().startswith('record '):
-                    filename = user_input[7:].strip()
-                    self.recorder.start_recording()
-                    self.recorder.record_file = filename
-                    continue
-
-                # 回放命令
-                if user_input.lower() == 'play':
-                    self.recorder.load_script()
-                    self.recorder.play(self.executor, self.parser)
-                    continue
-
-                if user_input.lower().startswith('play '):
-                    filename = user_input[5:].strip()
-                    self.recorder.load_script(filename)
-                    self.recorder.play(self.executor, self.parser)
-                    continue
-
-                # 脚本执行命令
-                if user_input.lower().startswith('script '):
-                    script_file = user_input[7:].strip()
-                    self._run_script(script_file)
-                    continue
-
-                # 配置命令
-                if user_input.lower().startswith('config '):
-                    parts = user_input[7:].strip().split(' ', 1)
-                    if len(parts) == 2:
-                        key, value = parts
-                        self.config.set(key, value)
-                        print(f"[配置] {key} = {value}")
-                    else:
-                        print("[配置] 当前配置:")
-                        for k, v in self.config.data.items():
-                            print(f"  {k}: {v}")
-                    continue
-
-                # 定时任务命令
-                if user_input.lower().startswith('schedule '):
-                    parts = user_input[9:].strip().split(' ', 1)
-                    if len(parts) == 2:
-                        time_str, cmd = parts
-                        self.scheduler.add(time_str, cmd)
-                    continue
-
-                if user_input.lower() == 'scheduler start':
-                    import threading
-                    self.scheduler.running = True
-                    t = threading.Thread(target=self.scheduler.run, args=(self.parser, self.executor))
-                    t.daemon = True
-                    t.start()
-                    continue
-
-                if user_input.lower() == 'scheduler stop':
-                    self.scheduler.stop()
+                # 特殊命令：按首个单词查表分发
+                handler = self._commands.get(lhead)
+                rest = rest.strip()
+                if handler and not (rest and lhead in self._no_arg_commands):
+                    handler(rest)
                     continue
 
                 # 解析并执行
@@ -1285,10 +1710,9 @@ class GodHandCLI:
                     continue
 
                 print(f"\n解析到 {len(actions)} 个动作")
-                results = self.executor.execute_batch(actions)
+                results, success_count = self.executor.execute_batch(actions)
 
                 # 显示结果
-                success_count = sum(1 for r in results if r.get('success'))
                 print(f"\n[完成] {success_count}/{len(results)} 个动作成功")
 
             except KeyboardInterrupt:
@@ -1297,78 +1721,96 @@ class GodHandCLI:
             except Exception as e:
                 print(f"[ERROR] {e}")
 
+    def _cmd_exit(self, arg: str):
+        if self.recorder.is_recording:
+            self.recorder.stop_recording()
+        print("再见!")
+        self.running = False
+
+    def _cmd_help(self, arg: str):
+        self.show_help()
+
+    def _cmd_record(self, arg: str):
+        """record [文件名]"""
+        self.recorder.start_recording()
+        if arg:
+            self.recorder.record_file = arg
+
+    def _cmd_play(self, arg: str):
+        """play [文件名]"""
+        self.recorder.load_script(arg or None)
+        self.recorder.play(self.executor, self.parser)
+
+    def _cmd_script(self, arg: str):
+        """script 文件名"""
+        if arg:
+            self._run_script(arg)
+        else:
+            print("[脚本] 用法: script 文件名")
+
+    def _cmd_config(self, arg: str):
+        """config [key value]"""
+        key, _, value = arg.partition(' ')
+        value = value.strip()
+        if key and value:
+            self.config.set(key, value)
+            print(f"[配置] {key} = {value}")
+        else:
+            print("[配置] 当前配置:")
+            for k, v in self.config.data.items():
+                print(f"  {k}: {v}")
+
+    def _cmd_schedule(self, arg: str):
+        """schedule HH:MM 指令"""
+        time_str, _, cmd = arg.partition(' ')
+        cmd = cmd.strip()
+        if cmd:
+            self.scheduler.add(time_str, cmd)
+        else:
+            print("[调度] 用法: schedule HH:MM 指令")
+
+    def _cmd_scheduler(self, arg: str):
+        """scheduler start|stop"""
+        arg = arg.lower()
+        if arg == 'start':
+            self.scheduler.start(self.parser, self.executor)
+        elif arg == 'stop':
+            self.scheduler.stop()
+        else:
+            print("[调度] 用法: scheduler start|stop")
+
     def _run_script(self, filename: str):
         """执行脚本文件"""
         try:
+            # 逐行读取并执行，不把整个脚本读进内存
             with open(filename, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
+                print(f"\n[脚本] 执行 {filename}")
+                print("=" * 60)
 
-            print(f"\n[脚本] 执行 {filename}，共 {len(lines)} 行")
-            print("=" * 60)
-
-            for i, line in enumerate(lines, 1):
-                line = line.strip()
-                if not line or line.startswith('#'):
-                    continue
+                line_count = 0
+                for line_count, raw in enumerate(f, 1):
+                    line = raw.strip()
+                    if not line or line.startswith('#'):
+                        continue
 
-                print(f"\n[{i}] {line}")
-                actions = self.parser.parse(line)
+                    print(f"\n[{line_count}] {line}")
+                    actions = self.parser.parse(line)
 
-                if actions:
-                    for action in actions:
-                        self.executor.execute(action)
-                else:
-                    print(f"  [ERROR] 无法解析: {line}")
+                    if actions:
+                        for action in actions:
+                            self.executor.execute(action)
+                    else:
+                        print(f"  [ERROR] 无法解析: {line}")
 
             print(f"\n{'='*60}")
-            print("[脚本] 执行完成")
+            print(f"[脚本] 执行完成，共 {line_count} 行")
 
         except Exception as e:
             print(f"[ERROR] 脚本执行失败: {e}")
 
     def show_help(self):
         """显示帮助"""
-        print("\n" + "=" * 60)
-        print("GodHand CLI v3.2 - 使用帮助")
-        print("=" * 60)
-        print("\n基础示例:")
-        print("  打开记事本")
-        print("  打开记事本 然后输入Hello World 然后按回车")
-        print("  点击 500, 500")
-        print("  双击")
-        print("  输入 你好世界")
-        print("  按 enter")
-        print("  快捷键 ctrl+s")
-        print("  等待 3")
-        print("  截图")
-        print("  获取鼠标位置")
-        print("  复制 / 粘贴")
-        print("  循环 3次 截图")
-        print("\n录制与回放:")
-        print("  record            - 开始录制")
-        print("  record my.json    - 录制到指定文件")
-        print("  stop              - 停止录制")
-        print("  play              - 回放录制")
-        print("  play my.json      - 回放指定脚本")
-        print("\n脚本执行:")
-        print("  script myscript.txt - 执行脚本文件")
-        print("  (脚本文件每行一个命令，#开头为注释)")
-        print("\n配置管理:")
-        print("  config            - 显示当前配置")
-        print("  config key value  - 设置配置项")
-        print("\n定时任务:")
-        print("  schedule HH:MM command  - 添加定时任务")
-        print("  scheduler start     - 启动调度器")
-        print("  scheduler stop      - 停止调度器")
-        print("\n高级示例:")
-        print("  打开计算器 然后输入1 然后按加号 然后输入1 然后按等于")
-        print("  关闭 计算器")
-        print("  点击图片 button.png")
-        print("  等待图片 loading.png")
-        print("  列出窗口")
-        print("  激活 记事本")
-        print("  通知 任务完成")
-        print("=" * 60)
+        sys.stdout.write(_HELP_BANNER)
 
 
 def main():
@@ -13,17 +13,29 @@ GodHand CLI Enhanced v4.0 - 增强版命令行界面
 import sys
 import os
 import json
+import atexit
 import time
 import re
+import socket
 import subprocess
+import traceback
 from typing import List, Dict, Optional, Tuple, Any
 from dataclasses import dataclass, asdict, field
 from enum import Enum
 from datetime import datetime
 from pathlib import Path
+from urllib.parse import quote
+from functools import lru_cache, wraps
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
 
-# 添加核心模块路径
+# 添加核心模块路径；core 目录追加在末尾，只用于导入不依赖 GUI 库的 common
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'core'))
+
+from common import HAS_ORJSON, orjson, DATACLASS_SLOTS, shell_open
+
+import win_input  # Windows 下用 SendInput 批量发送键鼠事件
 
 # Fix Windows encoding for Chinese characters
 if sys.platform == 'win32':
@@ -45,6 +57,7 @@ try:
     import pyperclip
     HAS_PYAUTOGUI = True
     pyautogui.FAILSAFE = True
+    pyautogui.PAUSE = 0  # 动作间隔由 execute_batch 控制，不再叠加 pyautogui 的默认停顿
 except ImportError:
     HAS_PYAUTOGUI = False
 
@@ -54,11 +67,28 @@ try:
 except ImportError:
     HAS_PYGETWINDOW = False
 
+# 可选: pywin32 直接枚举窗口句柄，不为每个窗口构造 pygetwindow 包装对象
+HAS_WIN32GUI = False
+if sys.platform == 'win32':
+    try:
+        import win32gui
+        import win32con
+        HAS_WIN32GUI = True
+    except ImportError:
+        pass
+
+# 对话日志逐行写入，装有 orjson 时用它序列化
+if HAS_ORJSON:
+    def _compact_json(obj) -> str:
+        return orjson.dumps(obj).decode('utf-8')
+else:
+    _compact_json = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+
 # 禁用智能解析器导入（有依赖问题）
 HAS_SMART_PARSER = False
 
 
-class ActionType(Enum):
+class ActionType(str, Enum):
     """动作类型枚举"""
     OPEN_APP = "open_app"
     CLOSE_APP = "close_app"
@@ -99,7 +129,7 @@ class ActionType(Enum):
     UNKNOWN = "unknown"
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class Action:
     """动作定义"""
     type: ActionType
@@ -107,6 +137,19 @@ class Action:
     description: str = ""
 
 
+# 示例命令
+_EXAMPLES = (
+    "打开记事本 然后输入Hello World",
+    "打开计算器 然后输入1+1 然后按等于",
+    "搜索 Python教程",
+    "点击 500,500 然后等待 2 然后截图",
+    "打开画图 然后画个圆",
+    "循环 3次 获取鼠标位置",
+    "创建文件夹 test_folder",
+    "获取屏幕尺寸",
+)
+
+
 class KnowledgeBase:
     """知识库 - 存储如何使用系统的知识"""
 
@@ -173,51 +216,87 @@ class KnowledgeBase:
             r"(?:检查|自检|测试|状态|check|status)": "__CHECK__",
             r"(?:打开|启动|运行)\s*(.+?)\s*(?:然后|再|接着|并)": "__COMPOSITE__",
         }
-
-    def answer(self, question: str) -> Optional[str]:
-        """回答用户问题"""
-        question = question.lower().strip()
-
-        # 检查是否是特定模式
-        for pattern, template in self.question_patterns.items():
-            match = re.search(pattern, question, re.IGNORECASE)
-            if match:
-                if template == "__HELP__":
-                    return self.get_full_help()
-                elif template == "__CHECK__":
-                    return "__CHECK__"  # 特殊标记，让系统执行自检
-                elif template == "__COMPOSITE__":
-                    return self._explain_composite(match.group(1))
-                else:
-                    # 填充模板
-                    groups = match.groups()
-                    if groups:
-                        return f"你可以输入: '{template.format(*groups)}'"
-                    else:
-                        return f"你可以输入: '{template}'"
-
-        # 搜索知识库
-        for category, items in self.knowledge.items():
+        # 合并成一个总正则：每条模式包成 (?P<qN>[\s\S]*?模式)，用 match 从头匹配，
+        # 按顺序尝试各分支，保持原来“先列出的模式优先”的语义
+        self._question_rules = {}  # 分组名 -> (模板, 内部捕获组起始编号, 捕获组数)
+        branches = []
+        group_no = 1
+        for i, (pattern, template) in enumerate(self.question_patterns.items()):
+            name = f'q{i}'
+            n_groups = re.compile(pattern).groups
+            self._question_rules[name] = (template, group_no + 1, n_groups)
+            branches.append(f'(?P<{name}>[\\s\\S]*?{pattern})')
+            group_no += 1 + n_groups
+        self._question_re = re.compile('|'.join(branches), re.IGNORECASE)
+
+        self._build_keyword_index()
+        self._help_text = None
+        # 同一问题的回答不变，按问题文本缓存
+        self.answer = lru_cache(maxsize=512)(self._answer)
+
+    def clear_cache(self):
+        """修改 knowledge 后调用：重建关键词索引，清空帮助文本和回答缓存"""
+        self._build_keyword_index()
+        self._help_text = None
+        self.answer.cache_clear()
+
+    def _build_keyword_index(self):
+        """倒排索引：知识库关键词中的每个词 -> (知识条目顺序, 回答)
+
+        同一个词只记录最先出现的条目；另按词长建表，查询时按长度切片查字典，
+        结果与逐条做子串判断一致。
+        """
+        self._keyword_index = {}
+        order = 0
+        for items in self.knowledge.values():
             for keyword, answer in items.items():
-                if any(word in question for word in keyword.lower().split()):
-                    return answer
+                for word in keyword.lower().split():
+                    self._keyword_index.setdefault(word, (order, answer))
+                order += 1
+        self._keyword_lengths = sorted({len(word) for word in self._keyword_index})
 
-        # 模糊匹配
-        for category, items in self.knowledge.items():
-            for keyword, answer in items.items():
-                # 计算相似度 - 简单实现
-                keyword_words = set(keyword.lower().split())
-                question_words = set(question.split())
-                if keyword_words & question_words:  # 有交集
-                    return answer
+    def _answer(self, question: str) -> Optional[str]:
+        """回答用户问题（经 self.answer 缓存调用）"""
+        question = question.lower().strip()
 
-        return None
+        # 检查是否是特定模式（一次匹配，按命中的分组分发）
+        match = self._question_re.match(question)
+        if match:
+            template, first, n_groups = self._question_rules[match.lastgroup]
+            groups = tuple(match.group(g) for g in range(first, first + n_groups))
+            if template == "__HELP__":
+                return self.get_full_help()
+            elif template == "__CHECK__":
+                return "__CHECK__"  # 特殊标记，让系统执行自检
+            elif template == "__COMPOSITE__":
+                return self._explain_composite(groups[0])
+            elif groups:
+                # 填充模板
+                return f"你可以输入: '{template.format(*groups)}'"
+            else:
+                return f"你可以输入: '{template}'"
+
+        # 搜索知识库：问题中出现的关键词里，取最靠前的条目
+        # （原先的“词集合有交集”模糊匹配被子串匹配完全覆盖，不再单独扫描）
+        index = self._keyword_index
+        best = None
+        for length in self._keyword_lengths:
+            for start in range(len(question) - length + 1):
+                hit = index.get(question[start:start + length])
+                if hit and (best is None or hit[0] < best[0]):
+                    best = hit
+        return best[1] if best else None
 
     def _explain_composite(self, app: str) -> str:
         return f"这是复合指令。我会先打开 {app}，然后执行后续操作。复合指令支持多个'然后'连接。"
 
     def get_full_help(self) -> str:
-        """获取完整帮助信息"""
+        """获取完整帮助信息（首次调用时拼好并缓存）"""
+        if self._help_text is None:
+            self._help_text = self._build_help_text()
+        return self._help_text
+
+    def _build_help_text(self) -> str:
         lines = ["\n" + "=" * 60, "GodHand CLI v4.0 - 功能列表", "=" * 60]
 
         for category, items in self.knowledge.items():
@@ -230,18 +309,9 @@ class KnowledgeBase:
         lines.append("=" * 60 + "\n")
         return "\n".join(lines)
 
-    def get_examples(self) -> List[str]:
+    def get_examples(self) -> Tuple[str, ...]:
         """获取示例命令列表"""
-        return [
-            "打开记事本 然后输入Hello World",
-            "打开计算器 然后输入1+1 然后按等于",
-            "搜索 Python教程",
-            "点击 500,500 然后等待 2 然后截图",
-            "打开画图 然后画个圆",
-            "循环 3次 获取鼠标位置",
-            "创建文件夹 test_folder",
-            "获取屏幕尺寸",
-        ]
+        return _EXAMPLES
 
 
 class FunctionChecker:
@@ -249,9 +319,17 @@ class FunctionChecker:
 
     def __init__(self):
         self.results = []
+        self._size = None  # 本轮自检中查到的屏幕尺寸
+
+    def _get_screen_size(self):
+        """同一轮自检里只查询一次屏幕尺寸"""
+        if self._size is None:
+            self._size = pyautogui.size()
+        return self._size
 
     def check_all(self) -> Dict[str, Any]:
         """检查所有功能"""
+        self._size = None
         print("\n" + "=" * 60)
         print("系统自检中...")
         print("=" * 60)
@@ -267,10 +345,14 @@ class FunctionChecker:
             ("网络连接", self._check_network),
         ]
 
+        # 各项检查互不依赖，并发执行；结果仍按列表顺序输出
+        with ThreadPoolExecutor(max_workers=len(checks)) as pool:
+            futures = [(name, pool.submit(check_func)) for name, check_func in checks]
+
         results = {}
-        for name, check_func in checks:
+        for name, future in futures:
             try:
-                status, message = check_func()
+                status, message = future.result()
                 results[name] = {"status": status, "message": message}
                 icon = "[OK]" if status else "[FAIL]"
                 print(f"  {icon} {name}: {message}")
@@ -296,7 +378,7 @@ class FunctionChecker:
 
     def _check_pyautogui(self) -> Tuple[bool, str]:
         if HAS_PYAUTOGUI:
-            size = pyautogui.size()
+            size = self._get_screen_size()
             return True, f"已安装 (屏幕: {size[0]}x{size[1]})"
         return False, "未安装"
 
@@ -322,7 +404,7 @@ class FunctionChecker:
             return False, "无法检测 (pyautogui未安装)"
         try:
             # 尝试获取屏幕尺寸
-            size = pyautogui.size()
+            size = self._get_screen_size()
             return True, f"可以访问 ({size[0]}x{size[1]})"
         except Exception as e:
             return False, f"访问失败: {e}"
@@ -338,71 +420,213 @@ class FunctionChecker:
             return False, f"访问失败: {e}"
 
     def _check_network(self) -> Tuple[bool, str]:
+        # 只做 TCP 连接，不走 TLS 握手和 HTTP 请求
         try:
-            import urllib.request
-            urllib.request.urlopen("https://www.bing.com", timeout=3)
+            socket.create_connection(("www.bing.com", 443), timeout=2).close()
             return True, "连接正常"
-        except:
+        except OSError:
             return False, "连接失败 (搜索功能受限)"
 
 
 class ConversationMemory:
-    """对话记忆系统"""
+    """对话记忆系统
+
+    偏好、常用命令等小数据存在 memory_file（JSON）；对话记录逐条追加到
+    同名 .jsonl 文件，只在内存里保留最近 MAX_CONVERSATIONS 条。
+    """
+
+    MAX_CONVERSATIONS = 100
+    # .jsonl 超过保留条数的这么多倍时，重写为只含最近的记录
+    COMPACT_FACTOR = 10
 
     def __init__(self, memory_file="conversation_memory.json"):
         self.memory_file = memory_file
+        self.conversations_file = os.path.splitext(memory_file)[0] + '.jsonl'
+        self._log = None
+        self._log_lines = 0
+        self._dirty = False
         self.data = self._load()
+        atexit.register(self.close)
 
     def _load(self) -> Dict:
-        if os.path.exists(self.memory_file):
-            try:
-                with open(self.memory_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                pass
-        return {
+        data = {
             "conversations": [],
             "frequent_commands": {},
             "user_preferences": {},
             "last_session": None
         }
+        try:
+            with open(self.memory_file, 'r', encoding='utf-8') as f:
+                data.update(json.load(f))
+        except Exception:
+            pass
+        # 计数用 Counter，取前 N 个走 most_common（堆）而不是整体排序
+        data["frequent_commands"] = Counter(data["frequent_commands"])
+
+        try:
+            recent = deque(maxlen=self.MAX_CONVERSATIONS)
+            line_count = 0
+            with open(self.conversations_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    recent.append(line)
+                    line_count += 1
+            self._log_lines = line_count
+        except FileNotFoundError:
+            # 旧版把对话存在 JSON 里，迁移到 .jsonl
+            legacy = data["conversations"][-self.MAX_CONVERSATIONS:]
+            data["conversations"] = legacy
+            if legacy:
+                self._rewrite_log(legacy)
+            return data
+        except Exception:
+            data["conversations"] = []
+            return data
+
+        # 逐行解析，跳过损坏的行（崩溃时最后一行常常只写了一半）
+        conversations = []
+        corrupted = False
+        for line in recent:
+            if not line.strip():
+                continue
+            try:
+                conversations.append(json.loads(line))
+            except ValueError:
+                corrupted = True
+        data["conversations"] = conversations
+        if corrupted:
+            # 重写日志去掉坏行，否则下一条记录会接在半行后面
+            try:
+                self._rewrite_log(conversations)
+            except OSError as e:
+                print(f"[WARN] 对话日志修复失败: {e}")
+        return data
+
+    def _rewrite_log(self, records: List[Dict]):
+        """把对话日志重写为只包含 records"""
+        self._close_log()
+        tmp = self.conversations_file + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(_compact_json(record))
+                f.write('\n')
+        os.replace(tmp, self.conversations_file)
+        self._log_lines = len(records)
+
+    def _close_log(self):
+        if self._log:
+            self._log.close()
+            self._log = None
 
     def save(self):
+        """保存偏好和常用命令（先写临时文件再原子替换），并把对话日志刷盘"""
+        if self._log:
+            self._log.flush()
+        small = {k: v for k, v in self.data.items() if k != "conversations"}
+        tmp = Path(self.memory_file).with_suffix('.tmp')
         try:
-            with open(self.memory_file, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, ensure_ascii=False, indent=2)
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(small, f, ensure_ascii=False, indent=2)
+            os.replace(tmp, self.memory_file)
+            self._dirty = False
         except Exception as e:
             print(f"[WARN] 记忆保存失败: {e}")
 
+    def flush(self):
+        """有未保存的修改时才写记忆文件；对话日志总是刷盘"""
+        if self._dirty:
+            self.save()
+        elif self._log:
+            self._log.flush()
+
+    def close(self):
+        """保存未写入的修改并关闭对话日志"""
+        self.flush()
+        self._close_log()
+
     def add_conversation(self, user_input: str, system_response: str, success: bool):
-        self.data["conversations"].append({
+        record = {
             "timestamp": datetime.now().isoformat(),
             "user": user_input,
             "system": system_response,
             "success": success
-        })
+        }
+        conversations = self.data["conversations"]
+        conversations.append(record)
         # 只保留最近100条
-        if len(self.data["conversations"]) > 100:
-            self.data["conversations"] = self.data["conversations"][-100:]
+        if len(conversations) > self.MAX_CONVERSATIONS:
+            del conversations[:-self.MAX_CONVERSATIONS]
+
+        try:
+            if self._log_lines >= self.MAX_CONVERSATIONS * self.COMPACT_FACTOR:
+                self._rewrite_log(conversations)
+            else:
+                if self._log is None:
+                    self._log = open(self.conversations_file, 'a', buffering=65536, encoding='utf-8')
+                self._log.write(_compact_json(record))
+                self._log.write('\n')
+                self._log_lines += 1
+        except Exception as e:
+            print(f"[WARN] 对话记录写入失败: {e}")
 
         # 统计常用命令
         if user_input not in ["exit", "quit", "help", "check"]:
-            self.data["frequent_commands"][user_input] = \
-                self.data["frequent_commands"].get(user_input, 0) + 1
+            self.data["frequent_commands"][user_input] += 1
+            self._dirty = True
 
     def get_frequent_commands(self, n: int = 5) -> List[Tuple[str, int]]:
-        items = sorted(self.data["frequent_commands"].items(),
-                      key=lambda x: x[1], reverse=True)
-        return items[:n]
+        return self.data["frequent_commands"].most_common(n)
 
     def set_preference(self, key: str, value: Any):
         self.data["user_preferences"][key] = value
-        self.save()
+        self._dirty = True
 
     def get_preference(self, key: str, default=None):
         return self.data["user_preferences"].get(key, default)
 
 
+# 规则解析用的正则，导入时编译一次
+_RE_OPEN = re.compile(r'(?:打开|启动|运行)\s+(.+)')
+_RE_CLOSE = re.compile(r'(?:关闭|退出|关掉)\s*(.+)')
+_RE_CONTACT_SEARCH = re.compile(r'(?:查找|搜索|找)(?:微信)?(?:联系人|好友|朋友)?\s*(.+)')
+_RE_CLICK_XY = re.compile(r'(?:点击|单击).*?(\d+)\s*[,，]\s*(\d+)')
+_RE_TYPE = re.compile(r'(?:输入|打字|写)\s*(.+)')
+_RE_PRESS = re.compile(r'(?:按|按键|按下)\s*(.+)')
+_RE_HOTKEY = re.compile(r'(?:快捷键|热键)\s*(.+)')
+_RE_MOVE = re.compile(r'(?:移动|移到).*?(\d+)\s*[,，]\s*(\d+)')
+_RE_WAIT = re.compile(r'(?:等待|延时|wait)\s*(\d+(?:\.\d+)?)')
+_RE_SEARCH = re.compile(r'(?:搜索|查找|百度|google)\s*(.+)')
+_RE_DIR_CREATE = re.compile(r'(?:创建|新建).*?(?:文件夹|目录)\s*(.+)')
+_RE_FILE_CREATE = re.compile(r'(?:创建|新建).*?文件\s*(.+)')
+_RE_FILE_DELETE = re.compile(r'(?:删除|移除).*?文件\s*(.+)')
+_RE_ACTIVATE = re.compile(r'(?:激活|切换到|点击窗口)\s*(.+)')
+_RE_URL = re.compile(r'(?:打开|访问|浏览)\s*(https?://\S+)')
+_RE_LOOP = re.compile(r'(?:循环|重复)\s*(\d+)\s*(?:次|遍)?\s*(.+)')
+# 微信发消息: 发送消息给XXX / 给XXX发消息 / 微信发给XXX
+_RE_WECHAT_MSG = (
+    re.compile(r'(?:发送|发)?(?:消息|信息)?\s*给\s*(.+?)(?:\s*(?:说|发送|发|:|：)\s*(.+))?$'),
+    re.compile(r'给\s*(.+?)\s*(?:发送|发)?(?:消息|信息)(?:\s*(?:说|内容是|:|：)\s*(.+))?$'),
+    re.compile(r'微信(?:发送|发)?(?:给|消息给)\s*(.+?)(?:\s*(?:说|发送|发|:|：)\s*(.+))?$'),
+)
+# 问句开头、特殊命令
+_QUESTION_PREFIXES = ('如何', '怎么', '怎样', '什么', '哪里', '为什么', '你能')
+_SPECIAL_COMMANDS = frozenset({"help", "?", "帮助", "check", "自检", "version", "版本"})
+_HELP_WORDS = frozenset({"help", "?", "帮助"})
+_VERSION_WORDS = frozenset({"version", "版本", "v"})
+_CHECK_WORDS = frozenset({"check", "自检", "测试", "test"})
+# 复合指令：连接词、分隔符与各分句的动词
+_RE_COMPOSITE_MARKER = re.compile(r'然后|再|接着')
+_RE_COMPOSITE_SPLIT = re.compile(r'(?:然后|再|接着|，|,)')
+# 分句首字 -> [(动词, 类别)]，同一首字下长动词在前（“按键 esc” 取 esc 而不是 “键 esc”）
+_PART_VERBS = {
+    '打': (('打开', 'open'), ('打字', 'type')),
+    '启': (('启动', 'open'),),
+    '运': (('运行', 'open'),),
+    '输': (('输入', 'type'),),
+    '写': (('写', 'type'),),
+    '按': (('按键', 'press'), ('按下', 'press'), ('按', 'press')),
+}
+
+
 class EnhancedParser:
     """增强版解析器 - 使用LLM智能解析"""
 
@@ -423,6 +647,19 @@ class EnhancedParser:
             self.has_llm = False
             self.llm_parser = None
 
+        # 规则解析结果按指令缓存（返回元组，调用方拿到的是新列表；执行器不修改 Action）
+        self._rule_parse = lru_cache(maxsize=512)(self._rule_parse_uncached)
+        self._parse_part = lru_cache(maxsize=256)(self._parse_part_uncached)
+
+    def _rule_parse_uncached(self, instruction: str, instruction_lower: str) -> Tuple[Action, ...]:
+        return tuple(self._basic_parse(instruction, instruction_lower))
+
+    def clear_cache(self):
+        """清空解析缓存和知识库回答缓存"""
+        self._rule_parse.cache_clear()
+        self._parse_part.cache_clear()
+        self.knowledge.clear_cache()
+
     def parse(self, instruction: str) -> Tuple[List[Action], Optional[str]]:
         """
         解析指令，返回 (动作列表, 问答回复)
@@ -435,15 +672,14 @@ class EnhancedParser:
         instruction_lower = instruction.lower()
 
         # 先检查是否是问句（以疑问词开头）- 优先作为问答
-        question_prefixes = ['如何', '怎么', '怎样', '什么', '哪里', '为什么', '你能']
-        if any(instruction_lower.startswith(p) for p in question_prefixes):
+        if instruction_lower.startswith(_QUESTION_PREFIXES):
             answer = self.knowledge.answer(instruction)
             if answer and not answer.startswith("__"):
                 return [Action(ActionType.QUESTION, {"answer": answer}, "问答")], None
 
         # 特殊命令：帮助、自检、退出等
-        if instruction_lower in ["help", "?", "帮助", "check", "自检", "version", "版本"]:
-            return self._basic_parse(instruction), None
+        if instruction_lower in _SPECIAL_COMMANDS:
+            return list(self._rule_parse(instruction, instruction_lower)), None
 
         # 优先使用LLM解析（如果有）
         if self.has_llm and self.llm_parser:
@@ -455,49 +691,45 @@ class EnhancedParser:
                 print(f"[WARN] LLM解析失败: {e}，使用规则解析")
 
         # 回退到规则解析
-        return self._basic_parse(instruction), None
+        return list(self._rule_parse(instruction, instruction_lower)), None
 
-    def _basic_parse(self, instruction: str) -> List[Action]:
-        """基础解析规则"""
-        instruction_lower = instruction.lower().strip()
+    def _basic_parse(self, instruction: str, instruction_lower: Optional[str] = None) -> List[Action]:
+        """基础解析规则（instruction 已 strip；调用方已算好小写时直接传入）"""
+        if instruction_lower is None:
+            instruction_lower = instruction.lower()
 
         # 帮助
-        if instruction_lower in ["help", "?", "帮助"]:
+        if instruction_lower in _HELP_WORDS:
             return [Action(ActionType.HELP, {}, "显示帮助")]
 
         # 版本
-        if instruction_lower in ["version", "版本", "v"]:
+        if instruction_lower in _VERSION_WORDS:
             return [Action(ActionType.QUESTION, {"answer": "GodHand CLI v4.0 Enhanced"}, "版本信息")]
 
         # 自检
-        if instruction_lower in ["check", "自检", "测试", "test"]:
+        if instruction_lower in _CHECK_WORDS:
             return [Action(ActionType.QUESTION, {"operation": "check"}, "系统自检")]
 
         # 复合指令: 打开X 然后Y
-        if "然后" in instruction_lower or "再" in instruction_lower or "接着" in instruction_lower:
-            return self._parse_composite(instruction_lower)
+        if _RE_COMPOSITE_MARKER.search(instruction_lower):
+            return self._parse_composite(instruction)
 
         # 打开应用 - 支持完整路径 "打开 C:\路径\app.exe"
-        match = re.search(r'(?:打开|启动|运行)\s+(.+)', instruction_lower)
+        match = _RE_OPEN.search(instruction_lower)
         if match:
             app = match.group(1).strip().strip('"\'')  # 去除引号
             return [Action(ActionType.OPEN_APP, {"app": app}, f"打开 {app}")]
 
         # 关闭应用
-        match = re.search(r'(?:关闭|退出|关掉)\s*(.+)', instruction_lower)
+        match = _RE_CLOSE.search(instruction_lower)
         if match:
             app = match.group(1).strip()
             return [Action(ActionType.CLOSE_APP, {"app": app}, f"关闭 {app}")]
 
         # 微信特定功能：发送消息给某人
         # 模式: 发送消息给XXX / 给XXX发消息 / 微信发给XXX
-        wechat_msg_patterns = [
-            r'(?:发送|发)?(?:消息|信息)?\s*给\s*(.+?)(?:\s*(?:说|发送|发|:|：)\s*(.+))?$',
-            r'给\s*(.+?)\s*(?:发送|发)?(?:消息|信息)(?:\s*(?:说|内容是|:|：)\s*(.+))?$',
-            r'微信(?:发送|发)?(?:给|消息给)\s*(.+?)(?:\s*(?:说|发送|发|:|：)\s*(.+))?$',
-        ]
-        for pattern in wechat_msg_patterns:
-            match = re.search(pattern, instruction_lower)
+        for pattern in _RE_WECHAT_MSG:
+            match = pattern.search(instruction_lower)
             if match:
                 contact = match.group(1).strip()
                 message = match.group(2).strip() if match.group(2) else ""
@@ -520,7 +752,7 @@ class EnhancedParser:
                 return actions
 
         # 微信：查找联系人/搜索联系人
-        contact_search = re.search(r'(?:查找|搜索|找)(?:微信)?(?:联系人|好友|朋友)?\s*(.+)', instruction_lower)
+        contact_search = _RE_CONTACT_SEARCH.search(instruction_lower)
         if contact_search:
             contact = contact_search.group(1).strip()
             return [
@@ -532,7 +764,7 @@ class EnhancedParser:
             ]
 
         # 点击坐标
-        match = re.search(r'(?:点击|单击).*?(\d+)\s*[,，]\s*(\d+)', instruction_lower)
+        match = _RE_CLICK_XY.search(instruction_lower)
         if match:
             x, y = int(match.group(1)), int(match.group(2))
             return [Action(ActionType.CLICK, {"x": x, "y": y}, f"点击 ({x}, {y})")]
@@ -549,32 +781,32 @@ class EnhancedParser:
         if "右键" in instruction_lower:
             return [Action(ActionType.RIGHT_CLICK, {}, "右键点击")]
 
-        # 输入文字
-        match = re.search(r'(?:输入|打字|写)\s*(.+)', instruction_lower)
+        # 输入文字（从原文中取，保留大小写）
+        match = _RE_TYPE.search(instruction)
         if match:
             text = match.group(1).strip().strip('"\'')
             return [Action(ActionType.TYPE, {"text": text}, f'输入 "{text[:20]}..."' if len(text) > 20 else f'输入 "{text}"')]
 
         # 按键
-        match = re.search(r'(?:按|按键|按下)\s*(.+)', instruction_lower)
+        match = _RE_PRESS.search(instruction_lower)
         if match:
             key = match.group(1).strip()
             return [Action(ActionType.PRESS_KEY, {"key": key}, f"按 {key}")]
 
         # 快捷键
-        match = re.search(r'(?:快捷键|热键)\s*(.+)', instruction_lower)
+        match = _RE_HOTKEY.search(instruction_lower)
         if match:
             keys = [k.strip() for k in match.group(1).split('+')]
             return [Action(ActionType.HOTKEY, {"keys": keys}, f"快捷键 {'+'.join(keys)}")]
 
         # 移动鼠标
-        match = re.search(r'(?:移动|移到).*?(\d+)\s*[,，]\s*(\d+)', instruction_lower)
+        match = _RE_MOVE.search(instruction_lower)
         if match:
             x, y = int(match.group(1)), int(match.group(2))
             return [Action(ActionType.MOVE, {"x": x, "y": y}, f"移动鼠标到 ({x}, {y})")]
 
         # 等待
-        match = re.search(r'(?:等待|延时|wait)\s*(\d+(?:\.\d+)?)', instruction_lower)
+        match = _RE_WAIT.search(instruction_lower)
         if match:
             seconds = float(match.group(1))
             return [Action(ActionType.WAIT, {"seconds": seconds}, f"等待 {seconds} 秒")]
@@ -584,7 +816,7 @@ class EnhancedParser:
             return [Action(ActionType.SCREENSHOT, {}, "截图")]
 
         # 搜索
-        match = re.search(r'(?:搜索|查找|百度|google)\s*(.+)', instruction_lower)
+        match = _RE_SEARCH.search(instruction_lower)
         if match:
             query = match.group(1).strip()
             return [Action(ActionType.SEARCH, {"query": query}, f"搜索: {query}")]
@@ -598,19 +830,19 @@ class EnhancedParser:
             return [Action(ActionType.GET_SCREEN_SIZE, {}, "获取屏幕尺寸")]
 
         # 创建文件夹
-        match = re.search(r'(?:创建|新建).*?(?:文件夹|目录)\s*(.+)', instruction_lower)
+        match = _RE_DIR_CREATE.search(instruction_lower)
         if match:
             path = match.group(1).strip()
             return [Action(ActionType.DIR_CREATE, {"path": path}, f"创建文件夹: {path}")]
 
         # 创建文件
-        match = re.search(r'(?:创建|新建).*?文件\s*(.+)', instruction_lower)
+        match = _RE_FILE_CREATE.search(instruction_lower)
         if match:
             path = match.group(1).strip()
             return [Action(ActionType.FILE_CREATE, {"path": path}, f"创建文件: {path}")]
 
         # 删除文件
-        match = re.search(r'(?:删除|移除).*?文件\s*(.+)', instruction_lower)
+        match = _RE_FILE_DELETE.search(instruction_lower)
         if match:
             path = match.group(1).strip()
             return [Action(ActionType.FILE_DELETE, {"path": path}, f"删除文件: {path}")]
@@ -620,7 +852,7 @@ class EnhancedParser:
             return [Action(ActionType.LIST_WINDOWS, {}, "列出窗口")]
 
         # 激活窗口
-        match = re.search(r'(?:激活|切换到|点击窗口)\s*(.+)', instruction_lower)
+        match = _RE_ACTIVATE.search(instruction_lower)
         if match:
             title = match.group(1).strip()
             return [Action(ActionType.ACTIVATE_WINDOW, {"title": title}, f"激活窗口: {title}")]
@@ -646,13 +878,13 @@ class EnhancedParser:
             return [Action(ActionType.SELECT_ALL, {}, "全选")]
 
         # 浏览器打开
-        match = re.search(r'(?:打开|访问|浏览)\s*(https?://\S+)', instruction_lower)
+        match = _RE_URL.search(instruction_lower)
         if match:
             url = match.group(1)
             return [Action(ActionType.BROWSER_OPEN, {"url": url}, f"打开网页: {url}")]
 
         # 循环
-        match = re.search(r'(?:循环|重复)\s*(\d+)\s*(?:次|遍)?\s*(.+)', instruction_lower)
+        match = _RE_LOOP.search(instruction_lower)
         if match:
             count = int(match.group(1))
             sub_cmd = match.group(2).strip()
@@ -666,54 +898,172 @@ class EnhancedParser:
         return [Action(ActionType.TYPE, {"text": instruction}, f"输入: {instruction}")]
 
     def _parse_composite(self, instruction: str) -> List[Action]:
-        """解析复合指令"""
+        """解析复合指令
+
+        各分句互不影响，分句结果单独缓存：在已输入的指令后追加“然后 ...”时，
+        前面的分句直接命中缓存，只解析新增部分。
+        """
         actions = []
 
         # 分割指令
-        parts = re.split(r'(?:然后|再|接着|，|,)', instruction)
-
-        for part in parts:
+        for part in _RE_COMPOSITE_SPLIT.split(instruction):
             part = part.strip()
-            if not part:
-                continue
+            if part:
+                actions.extend(self._parse_part(part))
 
-            # 检查是否是"打开X"
-            open_match = re.match(r'^(?:打开|启动|运行)\s*(.+)$', part)
-            if open_match:
-                app = open_match.group(1).strip()
-                actions.append(Action(ActionType.OPEN_APP, {"app": app}, f"打开 {app}"))
-                actions.append(Action(ActionType.WAIT, {"seconds": 2}, "等待应用启动"))
-                continue
+        return actions
 
-            # 检查是否是"输入X"
-            type_match = re.match(r'^(?:输入|打字|写)\s*(.+)$', part)
-            if type_match:
-                text = type_match.group(1).strip().strip('"\'')
-                actions.append(Action(ActionType.TYPE, {"text": text}, f"输入: {text[:20]}"))
-                continue
+    def _parse_part_uncached(self, part: str) -> Tuple[Action, ...]:
+        """解析复合指令中的一个分句（只小写一次，输入的文字保留原始大小写）"""
+        part_lower = part.lower()
 
-            # 检查是否是"按X"
-            press_match = re.match(r'^(?:按|按键|按下)\s*(.+)$', part)
-            if press_match:
-                key = press_match.group(1).strip()
-                actions.append(Action(ActionType.PRESS_KEY, {"key": key}, f"按 {key}"))
+        # 按首字查动词表：打开X / 输入X / 按X（part 已 strip，动词后还有内容才算）
+        for verb, kind in _PART_VERBS.get(part[:1], ()):
+            if not part.startswith(verb) or len(part) == len(verb):
                 continue
-
-            # 其他指令
-            sub_actions = self._basic_parse(part)
-            if sub_actions and sub_actions[0].type != ActionType.TYPE:
-                actions.extend(sub_actions)
-            else:
-                # 如果无法解析，作为视觉动作
-                actions.append(Action(ActionType.VISUAL_ACTION, {"description": part}, f"视觉动作: {part}"))
-
-        return actions
+            if kind == 'open':
+                app = part_lower[len(verb):].strip()
+                return (Action(ActionType.OPEN_APP, {"app": app}, f"打开 {app}"),
+                        Action(ActionType.WAIT, {"seconds": 2}, "等待应用启动"))
+            if kind == 'type':
+                text = part[len(verb):].strip().strip('"\'')
+                return (Action(ActionType.TYPE, {"text": text}, f"输入: {text[:20]}"),)
+            key = part_lower[len(verb):].strip()
+            return (Action(ActionType.PRESS_KEY, {"key": key}, f"按 {key}"),)
+
+        # 其他指令
+        sub_actions = self._basic_parse(part, part_lower)
+        if sub_actions and sub_actions[0].type != ActionType.TYPE:
+            return tuple(sub_actions)
+        # 如果无法解析，作为视觉动作
+        return (Action(ActionType.VISUAL_ACTION, {"description": part_lower}, f"视觉动作: {part_lower}"),)
+
+
+# 子进程不弹出控制台窗口（仅 Windows 有此标志）
+_CREATE_NO_WINDOW = getattr(subprocess, 'CREATE_NO_WINDOW', 0)
+
+# 可交给 taskkill 的进程名（字母数字、中文、下划线、点和连字符）
+_RE_PROCESS_NAME = re.compile(r'^[\w.-]+$')
+
+# 常见应用 -> 可执行文件名
+_EXE_MAP = {
+    '微信': 'WeChat.exe',
+    'wechat': 'WeChat.exe',
+    'qq': 'QQ.exe',
+    '钉钉': 'DingTalk.exe',
+    'dingtalk': 'DingTalk.exe',
+    '企业微信': 'WXWork.exe',
+    'tim': 'TIM.exe',
+    'vscode': 'Code.exe',
+    'code': 'Code.exe',
+    'chrome': 'chrome.exe',
+    'edge': 'msedge.exe',
+    'firefox': 'firefox.exe',
+    'notepad++': 'notepad++.exe',
+}
+
+# 开始菜单快捷方式的常见中英文名称
+_SHORTCUT_NAMES = {
+    '微信': ['微信', 'WeChat'],
+    'wechat': ['微信', 'WeChat'],
+    'qq': ['QQ'],
+    '钉钉': ['钉钉', 'DingTalk'],
+    'chrome': ['Chrome', 'Google Chrome'],
+    'edge': ['Edge', 'Microsoft Edge'],
+    'vscode': ['Visual Studio Code', 'VS Code', 'Code'],
+}
+
+# 视觉动作里的画图形状：一次匹配，按列出的顺序优先（描述里同时有“圆”和“方”时画圆）
+_RE_VISUAL_SHAPE = re.compile(r'[\s\S]*?(?P<circle>圆)|[\s\S]*?(?P<rect>方|矩形)')
+# 形状 -> (画图工具栏中工具的位置 x, y, 名称)，位置基于常见布局
+_VISUAL_SHAPES = {
+    'circle': (100, 100, '圆'),
+    'rect': (70, 100, '矩形'),
+}
+
+
+class _StopEnum(Exception):
+    """在 EnumWindows 回调里抛出，用来提前结束枚举"""
+
+
+def _enum_windows(limit: Optional[int] = None) -> Tuple[List[Tuple[int, str]], int]:
+    """一次 EnumWindows 统计可见且有标题的顶层窗口
+
+    返回 (前 limit 个窗口的 (hwnd, title), 窗口总数)；超出 limit 的窗口只计数，不取标题。
+    """
+    windows = []
+    total = 0
+
+    def callback(hwnd, _):
+        nonlocal total
+        if win32gui.IsWindowVisible(hwnd) and win32gui.GetWindowTextLength(hwnd):
+            total += 1
+            if limit is None or len(windows) < limit:
+                windows.append((hwnd, win32gui.GetWindowText(hwnd)))
+        return True
+
+    win32gui.EnumWindows(callback, None)
+    return windows, total
+
+
+def _find_window(title: str) -> Optional[Tuple[int, str]]:
+    """查找窗口：标题完全相同的优先（找到即停止枚举），否则取第一个包含 title 的窗口（不区分大小写）"""
+    title_lower = title.lower()
+    found = {}
+
+    def callback(hwnd, _):
+        if not win32gui.IsWindowVisible(hwnd):
+            return True
+        text = win32gui.GetWindowText(hwnd)
+        if text == title:
+            found['exact'] = (hwnd, text)
+            raise _StopEnum
+        if 'fuzzy' not in found and title_lower in text.lower():
+            found['fuzzy'] = (hwnd, text)
+        return True
+
+    try:
+        win32gui.EnumWindows(callback, None)
+    except _StopEnum:
+        pass
+    return found.get('exact') or found.get('fuzzy')
+
+
+def _activate_hwnd(hwnd: int):
+    """还原最小化的窗口并切到前台"""
+    if win32gui.IsIconic(hwnd):
+        win32gui.ShowWindow(hwnd, win32con.SW_RESTORE)
+    win32gui.SetForegroundWindow(hwnd)
+
+
+def _requires(available: bool, error: str):
+    """处理函数的依赖检查：定义时依赖已缺失的，直接替换为返回错误结果的函数"""
+    def decorator(func):
+        if available:
+            return func
+
+        @wraps(func)
+        def unavailable(self, action: Action) -> Dict:
+            return {"success": False, "error": error}
+        return unavailable
+    return decorator
 
 
 class EnhancedExecutor:
     """增强版执行器"""
 
-    def __init__(self):
+    LIST_WINDOWS_LIMIT = 15  # 列出窗口时最多显示的数量
+
+    def __init__(self, knowledge: Optional[KnowledgeBase] = None):
+        self._knowledge = knowledge  # 未传入时，显示帮助时才创建
+        self._screen_size = None  # 首次查询后缓存，见 refresh_screen_size()
+        # 动作类型值 -> 处理函数，执行时直接查表
+        # （按 value 字符串建表：LLM 解析器返回的是 llm_parser 自己的 ActionType）
+        self._handlers = {
+            action_type.value: getattr(self, f'_exec_{action_type.value}')
+            for action_type in ActionType
+            if hasattr(self, f'_exec_{action_type.value}')
+        }
         self.app_map = {
             '计算器': 'calc.exe',
             '记事本': 'notepad.exe',
@@ -758,13 +1108,15 @@ class EnhancedExecutor:
             '点': '.',
             '句号': '.',
         }
+        # 名称解析带子串回退，结果按名称缓存
+        self._resolve_app = lru_cache(maxsize=256)(self._lookup_app)
 
     def execute(self, action: Action) -> Dict:
         """执行动作，带错误处理"""
         result = {"success": False, "output": "", "error": None}
 
         try:
-            handler = getattr(self, f'_exec_{action.type.value}', None)
+            handler = self._handlers.get(action.type.value)
             if handler:
                 result = handler(action)
             else:
@@ -774,15 +1126,17 @@ class EnhancedExecutor:
 
         return result
 
-    def execute_batch(self, actions: List[Action]) -> List[Dict]:
-        """批量执行"""
+    def execute_batch(self, actions: List[Action]) -> Tuple[List[Dict], int]:
+        """批量执行动作，返回 (结果列表, 成功数)"""
         results = []
+        success_count = 0
         for i, action in enumerate(actions, 1):
             print(f"  [{i}/{len(actions)}] {action.description}")
             result = self.execute(action)
             results.append(result)
 
             if result.get("success"):
+                success_count += 1
                 print(f"      [OK] {result.get('output', '完成')}")
             else:
                 print(f"      [FAIL] {result.get('error', '未知错误')}")
@@ -790,17 +1144,18 @@ class EnhancedExecutor:
             # 动作间短暂延迟
             time.sleep(0.1)
 
-        return results
+        return results, success_count
 
-    def _resolve_app(self, app_name: str) -> str:
-        """解析应用名称为命令"""
+    def _lookup_app(self, app_name: str) -> str:
+        """解析应用名称为命令（经 self._resolve_app 缓存后调用）"""
         app_lower = app_name.lower()
-        if app_lower in self.app_map:
-            return self.app_map[app_lower]
-        for name, cmd in self.app_map.items():
-            if name in app_lower or app_lower in name:
-                return cmd
-        return app_name
+        cmd = self.app_map.get(app_lower)
+        if cmd is not None:
+            return cmd
+        return next(
+            (cmd for name, cmd in self.app_map.items() if name in app_lower or app_lower in name),
+            app_name
+        )
 
     def _resolve_key(self, key: str) -> str:
         """解析按键名称"""
@@ -815,7 +1170,7 @@ class EnhancedExecutor:
             clean_path = app.strip('"\'')
             if os.path.exists(clean_path):
                 try:
-                    subprocess.Popen(f'"{clean_path}"', shell=True)
+                    shell_open(clean_path)
                     return {"success": True, "output": f"已启动: {clean_path}"}
                 except Exception as e:
                     return {"success": False, "error": f"启动失败: {e}"}
@@ -823,19 +1178,18 @@ class EnhancedExecutor:
         # 获取可能的可执行文件名
         exe_name = self._get_exe_name(app)
 
-        # 1. 先尝试使用 start 命令启动（不显示错误）
+        # 1. 先尝试直接交给系统启动（App Paths / PATH 中能找到的）
         try:
-            result = subprocess.run(f'start "" {exe_name}', shell=True, capture_output=True, timeout=5)
-            if result.returncode == 0:
-                return {"success": True, "output": f"已启动: {app}"}
-        except:
+            shell_open(exe_name)
+            return {"success": True, "output": f"已启动: {app}"}
+        except OSError:
             pass
 
         # 2. 搜索开始菜单快捷方式
         shortcut = self._find_start_menu_shortcut(app)
         if shortcut:
             try:
-                subprocess.Popen(f'"{shortcut}"', shell=True)
+                shell_open(shortcut)
                 return {"success": True, "output": f"已启动 {app} (通过开始菜单)"}
             except Exception as e:
                 pass
@@ -846,7 +1200,7 @@ class EnhancedExecutor:
 
         if found_path:
             try:
-                subprocess.Popen(f'"{found_path}"', shell=True)
+                shell_open(found_path)
                 return {"success": True, "output": f"已启动 {app}: {found_path}"}
             except Exception as e:
                 return {"success": False, "error": f"找到 {app} 但启动失败: {e}"}
@@ -856,16 +1210,16 @@ class EnhancedExecutor:
         ps_path = self._search_with_powershell(exe_name)
         if ps_path:
             try:
-                subprocess.Popen(f'"{ps_path}"', shell=True)
+                shell_open(ps_path)
                 return {"success": True, "output": f"已启动 {app}: {ps_path}"}
             except Exception as e:
                 return {"success": False, "error": f"找到 {app} 但启动失败: {e}"}
 
         # 4. 最后尝试用中文名直接启动
         try:
-            subprocess.Popen(f'start "" "{app}"', shell=True)
+            shell_open(app)
             return {"success": True, "output": f"已尝试启动: {app}"}
-        except:
+        except OSError:
             pass
 
         return {"success": False, "error": f"找不到 {app}，请确认已安装"}
@@ -874,25 +1228,9 @@ class EnhancedExecutor:
         """根据应用名获取可执行文件名"""
         app_lower = app.lower()
 
-        # 常见应用映射
-        exe_map = {
-            '微信': 'WeChat.exe',
-            'wechat': 'WeChat.exe',
-            'qq': 'QQ.exe',
-            '钉钉': 'DingTalk.exe',
-            'dingtalk': 'DingTalk.exe',
-            '企业微信': 'WXWork.exe',
-            'tim': 'TIM.exe',
-            'vscode': 'Code.exe',
-            'code': 'Code.exe',
-            'chrome': 'chrome.exe',
-            'edge': 'msedge.exe',
-            'firefox': 'firefox.exe',
-            'notepad++': 'notepad++.exe',
-        }
-
-        if app_lower in exe_map:
-            return exe_map[app_lower]
+        exe = _EXE_MAP.get(app_lower)
+        if exe is not None:
+            return exe
 
         # 如果已经有.exe后缀，直接使用
         if app_lower.endswith('.exe'):
@@ -943,19 +1281,8 @@ class EnhancedExecutor:
         app_names = [app]
         app_lower = app.lower()
 
-        # 常见中英文映射
-        name_map = {
-            '微信': ['微信', 'WeChat'],
-            'wechat': ['微信', 'WeChat'],
-            'qq': ['QQ'],
-            '钉钉': ['钉钉', 'DingTalk'],
-            'chrome': ['Chrome', 'Google Chrome'],
-            'edge': ['Edge', 'Microsoft Edge'],
-            'vscode': ['Visual Studio Code', 'VS Code', 'Code'],
-        }
-
-        if app_lower in name_map:
-            app_names = name_map[app_lower]
+        if app_lower in _SHORTCUT_NAMES:
+            app_names = _SHORTCUT_NAMES[app_lower]
 
         # 开始菜单路径
         start_menu_paths = [
@@ -1016,15 +1343,23 @@ class EnhancedExecutor:
 
     def _exec_close_app(self, action: Action) -> Dict:
         app = action.params.get("app", "")
+        if not _RE_PROCESS_NAME.match(app):
+            return {"success": False, "error": f"无效的应用名: {app}"}
         try:
-            subprocess.run(f'taskkill /f /im {app}.exe', shell=True, capture_output=True)
+            completed = subprocess.run(
+                ['taskkill', '/f', '/im', f'{app}.exe'],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                creationflags=_CREATE_NO_WINDOW
+            )
+            if completed.returncode != 0:
+                return {"success": False, "error": f"关闭失败: {app} (taskkill 返回 {completed.returncode})"}
             return {"success": True, "output": f"已关闭: {app}"}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
+    @_requires(HAS_PYAUTOGUI, "pyautogui未安装")
     def _exec_click(self, action: Action) -> Dict:
-        if not HAS_PYAUTOGUI:
-            return {"success": False, "error": "pyautogui未安装"}
         x = action.params.get("x")
         y = action.params.get("y")
         if x is not None and y is not None:
@@ -1034,44 +1369,41 @@ class EnhancedExecutor:
             pyautogui.click()
             return {"success": True, "output": "点击当前位置"}
 
+    @_requires(HAS_PYAUTOGUI, "pyautogui未安装")
     def _exec_double_click(self, action: Action) -> Dict:
-        if not HAS_PYAUTOGUI:
-            return {"success": False, "error": "pyautogui未安装"}
         pyautogui.doubleClick()
         return {"success": True, "output": "双击"}
 
+    @_requires(HAS_PYAUTOGUI, "pyautogui未安装")
     def _exec_right_click(self, action: Action) -> Dict:
-        if not HAS_PYAUTOGUI:
-            return {"success": False, "error": "pyautogui未安装"}
         pyautogui.rightClick()
         return {"success": True, "output": "右键点击"}
 
+    @_requires(HAS_PYAUTOGUI, "pyautogui未安装")
     def _exec_type(self, action: Action) -> Dict:
-        if not HAS_PYAUTOGUI:
-            return {"success": False, "error": "pyautogui未安装"}
         text = action.params.get("text", "")
         pyperclip.copy(text)
-        pyautogui.hotkey('ctrl', 'v')
+        if not win_input.send_keys(('ctrl', 'v')):
+            pyautogui.hotkey('ctrl', 'v')
         return {"success": True, "output": f"输入: {text[:30]}{'...' if len(text) > 30 else ''}"}
 
+    @_requires(HAS_PYAUTOGUI, "pyautogui未安装")
     def _exec_press_key(self, action: Action) -> Dict:
-        if not HAS_PYAUTOGUI:
-            return {"success": False, "error": "pyautogui未安装"}
         key = self._resolve_key(action.params.get("key", ""))
-        pyautogui.press(key)
+        if not win_input.press(key):
+            pyautogui.press(key)
         return {"success": True, "output": f"按 {key}"}
 
+    @_requires(HAS_PYAUTOGUI, "pyautogui未安装")
     def _exec_hotkey(self, action: Action) -> Dict:
-        if not HAS_PYAUTOGUI:
-            return {"success": False, "error": "pyautogui未安装"}
         keys = action.params.get("keys", [])
         keys_lower = [k.lower() for k in keys]
-        pyautogui.hotkey(*keys_lower)
+        if not win_input.send_keys(keys_lower):
+            pyautogui.hotkey(*keys_lower)
         return {"success": True, "output": f"快捷键: {'+'.join(keys)}"}
 
+    @_requires(HAS_PYAUTOGUI, "pyautogui未安装")
     def _exec_move(self, action: Action) -> Dict:
-        if not HAS_PYAUTOGUI:
-            return {"success": False, "error": "pyautogui未安装"}
         x = action.params.get("x", 0)
         y = action.params.get("y", 0)
         pyautogui.moveTo(x, y)
@@ -1082,33 +1414,35 @@ class EnhancedExecutor:
         time.sleep(seconds)
         return {"success": True, "output": f"等待 {seconds} 秒"}
 
+    @_requires(HAS_PYAUTOGUI, "pyautogui未安装")
     def _exec_screenshot(self, action: Action) -> Dict:
-        if not HAS_PYAUTOGUI:
-            return {"success": False, "error": "pyautogui未安装"}
         filename = f"screenshot_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
         pyautogui.screenshot(filename)
         return {"success": True, "output": f"截图保存: {filename}"}
 
     def _exec_search(self, action: Action) -> Dict:
         query = action.params.get("query", "")
-        import urllib.parse
-        encoded = urllib.parse.quote(query)
+        encoded = quote(query)
         url = f'https://www.bing.com/search?q={encoded}'
-        subprocess.Popen(f'start msedge "{url}"', shell=True)
+        shell_open(url)  # 默认浏览器
         return {"success": True, "output": f"搜索: {query}"}
 
+    @_requires(HAS_PYAUTOGUI, "pyautogui未安装")
     def _exec_get_position(self, action: Action) -> Dict:
-        if not HAS_PYAUTOGUI:
-            return {"success": False, "error": "pyautogui未安装"}
         x, y = pyautogui.position()
         return {"success": True, "output": f"鼠标位置: ({x}, {y})"}
 
+    @_requires(HAS_PYAUTOGUI, "pyautogui未安装")
     def _exec_get_screen_size(self, action: Action) -> Dict:
-        if not HAS_PYAUTOGUI:
-            return {"success": False, "error": "pyautogui未安装"}
-        w, h = pyautogui.size()
+        if self._screen_size is None:
+            self.refresh_screen_size()
+        w, h = self._screen_size
         return {"success": True, "output": f"屏幕尺寸: {w}x{h}"}
 
+    def refresh_screen_size(self):
+        """重新查询屏幕尺寸（分辨率变化后调用）"""
+        self._screen_size = tuple(pyautogui.size())
+
     def _exec_dir_create(self, action: Action) -> Dict:
         path = action.params.get("path", "")
         try:
@@ -1120,8 +1454,8 @@ class EnhancedExecutor:
     def _exec_file_create(self, action: Action) -> Dict:
         path = action.params.get("path", "")
         try:
-            with open(path, 'w', encoding='utf-8') as f:
-                f.write('')
+            # 只需创建/清空文件，不必构造文本 IO 对象
+            os.close(os.open(path, os.O_CREAT | os.O_WRONLY | os.O_TRUNC, 0o666))
             return {"success": True, "output": f"创建文件: {path}"}
         except Exception as e:
             return {"success": False, "error": str(e)}
@@ -1134,40 +1468,48 @@ class EnhancedExecutor:
         except Exception as e:
             return {"success": False, "error": str(e)}
 
+    @_requires(HAS_WIN32GUI or HAS_PYGETWINDOW, "pygetwindow未安装")
     def _exec_list_windows(self, action: Action) -> Dict:
-        if not HAS_PYGETWINDOW:
-            return {"success": False, "error": "pygetwindow未安装"}
         try:
-            windows = [w for w in gw.getAllWindows() if w.title]
+            # 只列出前 LIST_WINDOWS_LIMIT 个窗口的标题
+            if HAS_WIN32GUI:
+                windows, total = _enum_windows(self.LIST_WINDOWS_LIMIT)
+                titles = [t for _, t in windows]
+            else:
+                titles = [t for t in gw.getAllTitles() if t]
+                total = len(titles)
             print("\n[窗口列表]")
-            for i, w in enumerate(windows[:15], 1):
-                print(f"  {i}. {w.title}")
-            return {"success": True, "output": f"共 {len(windows)} 个窗口"}
+            for i, title in enumerate(titles[:self.LIST_WINDOWS_LIMIT], 1):
+                print(f"  {i}. {title}")
+            return {"success": True, "output": f"共 {total} 个窗口"}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
+    @_requires(HAS_WIN32GUI or HAS_PYGETWINDOW, "pygetwindow未安装")
     def _exec_activate_window(self, action: Action) -> Dict:
-        if not HAS_PYGETWINDOW:
-            return {"success": False, "error": "pygetwindow未安装"}
         title = action.params.get("title", "")
         try:
-            windows = gw.getWindowsWithTitle(title)
-            if windows:
-                windows[0].activate()
-                return {"success": True, "output": f"激活窗口: {windows[0].title}"}
-            else:
-                # 模糊匹配
-                for w in gw.getAllWindows():
-                    if title.lower() in w.title.lower():
-                        w.activate()
-                        return {"success": True, "output": f"激活窗口: {w.title}"}
+            if HAS_WIN32GUI:
+                match = _find_window(title)
+                if match is None:
+                    return {"success": False, "error": f"未找到窗口: {title}"}
+                hwnd, text = match
+                _activate_hwnd(hwnd)
+                return {"success": True, "output": f"激活窗口: {text}"}
+            # 只枚举一次：先找标题完全相同的，再退回不区分大小写的包含匹配
+            windows = gw.getAllWindows()
+            title_lower = title.lower()
+            w = (next((w for w in windows if w.title == title), None)
+                 or next((w for w in windows if title_lower in w.title.lower()), None))
+            if w is None:
                 return {"success": False, "error": f"未找到窗口: {title}"}
+            w.activate()
+            return {"success": True, "output": f"激活窗口: {w.title}"}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
+    @_requires(HAS_PYGETWINDOW, "pygetwindow未安装")
     def _exec_minimize_window(self, action: Action) -> Dict:
-        if not HAS_PYGETWINDOW:
-            return {"success": False, "error": "pygetwindow未安装"}
         try:
             w = gw.getActiveWindow()
             if w:
@@ -1177,9 +1519,8 @@ class EnhancedExecutor:
         except Exception as e:
             return {"success": False, "error": str(e)}
 
+    @_requires(HAS_PYGETWINDOW, "pygetwindow未安装")
     def _exec_maximize_window(self, action: Action) -> Dict:
-        if not HAS_PYGETWINDOW:
-            return {"success": False, "error": "pygetwindow未安装"}
         try:
             w = gw.getActiveWindow()
             if w:
@@ -1189,63 +1530,57 @@ class EnhancedExecutor:
         except Exception as e:
             return {"success": False, "error": str(e)}
 
+    @_requires(HAS_PYAUTOGUI, "pyautogui未安装")
     def _exec_copy(self, action: Action) -> Dict:
-        if not HAS_PYAUTOGUI:
-            return {"success": False, "error": "pyautogui未安装"}
-        pyautogui.hotkey('ctrl', 'c')
+        if not win_input.send_keys(('ctrl', 'c')):
+            pyautogui.hotkey('ctrl', 'c')
         return {"success": True, "output": "复制"}
 
+    @_requires(HAS_PYAUTOGUI, "pyautogui未安装")
     def _exec_paste(self, action: Action) -> Dict:
-        if not HAS_PYAUTOGUI:
-            return {"success": False, "error": "pyautogui未安装"}
-        pyautogui.hotkey('ctrl', 'v')
+        if not win_input.send_keys(('ctrl', 'v')):
+            pyautogui.hotkey('ctrl', 'v')
         return {"success": True, "output": "粘贴"}
 
+    @_requires(HAS_PYAUTOGUI, "pyautogui未安装")
     def _exec_select_all(self, action: Action) -> Dict:
-        if not HAS_PYAUTOGUI:
-            return {"success": False, "error": "pyautogui未安装"}
-        pyautogui.hotkey('ctrl', 'a')
+        if not win_input.send_keys(('ctrl', 'a')):
+            pyautogui.hotkey('ctrl', 'a')
         return {"success": True, "output": "全选"}
 
     def _exec_browser_open(self, action: Action) -> Dict:
         url = action.params.get("url", "")
-        subprocess.Popen(f'start msedge "{url}"', shell=True)
+        shell_open(url)  # 默认浏览器
         return {"success": True, "output": f"打开网页: {url}"}
 
     def _exec_loop(self, action: Action) -> Dict:
         """循环执行 - 需要在主循环中处理"""
         return {"success": False, "error": "循环指令需要在主循环中处理"}
 
+    @staticmethod
+    def _draw_shape(tool_x: int, tool_y: int):
+        """点击画图工具，稍等工具栏响应后在画布上拖拽"""
+        if not win_input.click(tool_x, tool_y):
+            pyautogui.click(tool_x, tool_y)
+        time.sleep(0.05)
+        if not win_input.drag(400, 300, 600, 500, duration=0.2):
+            pyautogui.moveTo(400, 300)
+            pyautogui.dragTo(600, 500, duration=0.2)
+
+    @_requires(HAS_PYAUTOGUI, "pyautogui未安装，无法执行视觉动作")
     def _exec_visual_action(self, action: Action) -> Dict:
         """视觉动作 - 尝试执行"""
         description = action.params.get("description", "")
 
-        if not HAS_PYAUTOGUI:
-            return {"success": False, "error": "pyautogui未安装，无法执行视觉动作"}
-
-        # 尝试解析画图相关的动作
-        if "圆" in description:
-            # 在画图中画圆
-            try:
-                # 尝试点击椭圆工具位置 (基于常见布局)
-                pyautogui.click(100, 100)
-                time.sleep(0.2)
-                # 拖拽画圆
-                pyautogui.moveTo(400, 300)
-                pyautogui.dragTo(600, 500, duration=0.5)
-                return {"success": True, "output": "尝试画圆"}
-            except Exception as e:
-                return {"success": False, "error": f"画圆失败: {e}"}
-
-        if "方" in description or "矩形" in description:
+        # 尝试解析画图相关的动作：点击对应工具后在画布上拖拽
+        match = _RE_VISUAL_SHAPE.match(description)
+        if match:
+            tool_x, tool_y, name = _VISUAL_SHAPES[match.lastgroup]
             try:
-                pyautogui.click(70, 100)
-                time.sleep(0.2)
-                pyautogui.moveTo(400, 300)
-                pyautogui.dragTo(600, 500, duration=0.5)
-                return {"success": True, "output": "尝试画矩形"}
+                self._draw_shape(tool_x, tool_y)
+                return {"success": True, "output": f"尝试画{name}"}
             except Exception as e:
-                return {"success": False, "error": f"画矩形失败: {e}"}
+                return {"success": False, "error": f"画{name}失败: {e}"}
 
         return {"success": False, "output": f"视觉动作: {description} (需要手动执行)"}
 
@@ -1256,21 +1591,32 @@ class EnhancedExecutor:
         return {"success": True, "output": "已显示答案"}
 
     def _exec_help(self, action: Action) -> Dict:
-        kb = KnowledgeBase()
-        print(kb.get_full_help())
+        if self._knowledge is None:
+            self._knowledge = KnowledgeBase()
+        print(self._knowledge.get_full_help())
         return {"success": True, "output": "已显示帮助"}
 
 
+# 主循环里直接处理的命令（不经过解析器）
+_REPL_EXIT = frozenset({"exit", "quit", "q", "退出"})
+_REPL_CHECK = frozenset({"check", "自检", "test"})
+_REPL_EXAMPLES = frozenset({"examples", "示例", "例子"})
+_REPL_HISTORY = frozenset({"history", "历史"})
+
+
 class GodHandCLIEnhanced:
     """增强版CLI主类"""
 
     def __init__(self):
         self.parser = EnhancedParser()
-        self.executor = EnhancedExecutor()
+        # 解析器、执行器和主循环共用一个知识库，索引和帮助文本只构建一次
+        self.knowledge = self.parser.knowledge
+        self.executor = EnhancedExecutor(knowledge=self.knowledge)
         self.checker = FunctionChecker()
         self.memory = ConversationMemory()
-        self.knowledge = KnowledgeBase()
         self.running = True
+        # 终端里保留 input() 的行编辑；管道/粘贴输入直接按块读取 stdin
+        self._interactive = sys.stdin.isatty()
         self.show_banner()
 
     def show_banner(self):
@@ -1297,35 +1643,53 @@ class GodHandCLIEnhanced:
 """
         print(banner)
 
+    def _read_input(self) -> Optional[str]:
+        """读取一行输入，EOF 时返回 None"""
+        if self._interactive:
+            try:
+                return input("\nGodHand> ")
+            except EOFError:
+                return None
+        sys.stdout.write("\nGodHand> ")
+        sys.stdout.flush()
+        line = sys.stdin.readline()
+        return line if line else None
+
     def run(self):
         """运行主循环"""
         while self.running:
             try:
-                user_input = input("\nGodHand> ").strip()
+                user_input = self._read_input()
+                if user_input is None:
+                    self.memory.flush()
+                    break
+                user_input = user_input.strip()
 
                 if not user_input:
                     continue
 
+                lower = user_input.lower()
+
                 # 退出命令
-                if user_input.lower() in ["exit", "quit", "q", "退出"]:
+                if lower in _REPL_EXIT:
                     print("\n感谢使用 GodHand CLI Enhanced! 再见!")
-                    self.memory.save()
+                    self.memory.flush()
                     break
 
                 # 特殊命令处理
-                if user_input.lower() in ["check", "自检", "test"]:
+                if lower in _REPL_CHECK:
                     self.checker.check_all()
                     continue
 
-                if user_input.lower() in ["help", "?", "帮助"]:
+                if lower in _HELP_WORDS:
                     print(self.knowledge.get_full_help())
                     continue
 
-                if user_input.lower() in ["examples", "示例", "例子"]:
+                if lower in _REPL_EXAMPLES:
                     self.show_examples()
                     continue
 
-                if user_input.lower() in ["history", "历史"]:
+                if lower in _REPL_HISTORY:
                     self.show_history()
                     continue
 
@@ -1348,10 +1712,8 @@ class GodHandCLIEnhanced:
                     print(f"  {i}. {action.description}")
 
                 print("\n开始执行...")
-                results = self.executor.execute_batch(actions)
+                results, success_count = self.executor.execute_batch(actions)
 
-                # 统计结果
-                success_count = sum(1 for r in results if r.get("success"))
                 print(f"\n[结果] {success_count}/{len(results)} 个动作成功")
 
                 # 保存对话记忆
@@ -1360,11 +1722,10 @@ class GodHandCLIEnhanced:
 
             except KeyboardInterrupt:
                 print("\n\n再见!")
-                self.memory.save()
+                self.memory.flush()
                 break
             except Exception as e:
                 print(f"\n[错误] {e}")
-                import traceback
                 traceback.print_exc()
 
     def show_examples(self):
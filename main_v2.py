@@ -28,6 +28,9 @@ from dataclasses import dataclass, asdict
 from enum import Enum
 from contextlib import asynccontextmanager
 import uuid
+import hashlib
+from collections import OrderedDict
+from itertools import groupby
 
 # 设置日志
 logging.basicConfig(
@@ -39,7 +42,7 @@ logger = logging.getLogger(__name__)
 # FastAPI
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Request, BackgroundTasks
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, JSONResponse, FileResponse
+from fastapi.responses import HTMLResponse, JSONResponse, FileResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel, Field
@@ -47,6 +50,8 @@ from pydantic import BaseModel, Field
 # 导入核心模块
 sys.path.insert(0, str(Path(__file__).parent / "core"))
 
+from common import HAS_ORJSON, orjson, read_config_file
+
 try:
     from smart_parser_v2 import SmartParserV2, ActionExecutorV2, Action, ActionType, ParsedIntent, IntentCategory
     HAS_SMART_PARSER = True
@@ -105,7 +110,8 @@ class Session(BaseModel):
     """会话"""
     id: str
     created_at: str
-    messages: List[ChatMessage] = []
+    # 字段同 ChatMessage，直接存普通 dict，读取历史时不必逐条 .dict()
+    messages: List[Dict] = []
     context: Dict = {}
 
 
@@ -113,6 +119,34 @@ class Session(BaseModel):
 # 统一执行引擎
 # ============================================================================
 
+# 彼此独立、可以并发执行的动作类型（只启动外部程序，不操作键鼠和焦点）
+_PARALLEL_SAFE_TYPES = frozenset({'search'})
+
+# 聊天回复中各动作类型的图标
+_ACTION_EMOJI = {
+    'open_app': '📱',
+    'type_text': '⌨️',
+    'press_key': '🔘',
+    'hotkey': '⌨️',
+    'click': '🖱️',
+    'wait': '⏱️',
+    'search': '🔍',
+    'file': '📁',
+    'system': '⚙️',
+    'gui': '👁️',
+    'unknown': '❓'
+}
+
+# 无法理解指令时附带的示例
+_CHAT_EXAMPLES = (
+    "• 打开记事本 输入Hello World\n"
+    "• 打开计算器\n"
+    "• 搜索Python教程\n"
+    "• 截图\n"
+    "• 点击开始菜单"
+)
+
+
 class UnifiedExecutor:
     """
     统一执行引擎
@@ -174,8 +208,7 @@ class UnifiedExecutor:
         
         if os.path.exists(self.config_path):
             try:
-                with open(self.config_path, 'r', encoding='utf-8') as f:
-                    default.update(json.load(f))
+                default.update(read_config_file(self.config_path))
             except Exception as e:
                 logger.error(f"Failed to load config: {e}")
         
@@ -267,25 +300,31 @@ class UnifiedExecutor:
         else:
             # 混合模式 - 使用 SmartParser 的动作执行
             if actions and self.action_executor:
-                for action in actions:
-                    try:
-                        if action.type == ActionType.UNKNOWN:
-                            continue
-                        
-                        loop = asyncio.get_event_loop()
-                        result = await loop.run_in_executor(
-                            None, self.action_executor.execute, action
+                loop = asyncio.get_event_loop()
+                runnable = [a for a in actions if a.type != ActionType.UNKNOWN]
+                # 相邻的可并行动作合成一批并发执行，其余动作逐个执行；结果保持原顺序
+                for parallel, group in groupby(
+                        runnable, key=lambda a: a.type.value in _PARALLEL_SAFE_TYPES):
+                    group = list(group)
+                    batches = [group] if parallel else [[a] for a in group]
+                    for batch in batches:
+                        outcomes = await asyncio.gather(
+                            *(loop.run_in_executor(None, self.action_executor.execute, a)
+                              for a in batch),
+                            return_exceptions=True
                         )
-                        results.append(result)
-                        if not result.get('success'):
-                            success = False
-                    except Exception as e:
-                        success = False
-                        results.append({
-                            'success': False,
-                            'error': str(e),
-                            'action': action.to_dict()
-                        })
+                        for action, outcome in zip(batch, outcomes):
+                            if isinstance(outcome, Exception):
+                                success = False
+                                results.append({
+                                    'success': False,
+                                    'error': str(outcome),
+                                    'action': action.to_dict()
+                                })
+                            else:
+                                results.append(outcome)
+                                if not outcome.get('success'):
+                                    success = False
             else:
                 success = False
                 results.append({
@@ -319,7 +358,8 @@ class SessionManager:
     """会话管理器"""
     
     def __init__(self):
-        self.sessions: Dict[str, Session] = {}
+        # 按最近使用排序，超出上限时淘汰最久未用的会话
+        self.sessions: "OrderedDict[str, Session]" = OrderedDict()
         self.max_sessions = 100
     
     def create_session(self) -> str:
@@ -333,35 +373,35 @@ class SessionManager:
         
         # 清理旧会话
         if len(self.sessions) > self.max_sessions:
-            oldest = min(self.sessions.keys(), 
-                        key=lambda k: self.sessions[k].created_at)
-            del self.sessions[oldest]
+            self.sessions.popitem(last=False)
         
         return session_id
     
     def get_session(self, session_id: str) -> Optional[Session]:
         """获取会话"""
-        return self.sessions.get(session_id)
+        session = self.sessions.get(session_id)
+        if session is not None:
+            self.sessions.move_to_end(session_id)
+        return session
     
     def add_message(self, session_id: str, role: str, content: str, 
                    metadata: Dict = None):
         """添加消息"""
-        session = self.sessions.get(session_id)
+        session = self.get_session(session_id)
         if session:
-            message = ChatMessage(
-                role=role,
-                content=content,
-                timestamp=datetime.now().isoformat(),
-                metadata=metadata
-            )
-            session.messages.append(message)
+            session.messages.append({
+                'role': role,
+                'content': content,
+                'timestamp': datetime.now().isoformat(),
+                'metadata': metadata
+            })
     
     def get_history(self, session_id: str) -> List[Dict]:
         """获取会话历史"""
-        session = self.sessions.get(session_id)
+        session = self.get_session(session_id)
         if not session:
             return []
-        return [m.dict() for m in session.messages]
+        return list(session.messages)
 
 
 # ============================================================================
@@ -399,17 +439,28 @@ async def lifespan(app: FastAPI):
     logger.info(f"📸 截图目录: {base_dir / 'data' / 'screenshots'}")
     logger.info("=" * 60)
     
+    # 主页模板不依赖请求内容，启动时渲染一次
+    app.state.index_body = templates.get_template("index.html").render({"request": None})
+    app.state.index_etag = '"%s"' % hashlib.md5(app.state.index_body.encode('utf-8')).hexdigest()
+    
     yield
     
     # 关闭清理
     logger.info("GodHand Pro 关闭中...")
 
 
+# 安装了 orjson 时用它序列化所有 JSON 响应
+if HAS_ORJSON:
+    from fastapi.responses import ORJSONResponse as _JSONResponse
+else:
+    _JSONResponse = JSONResponse
+
 app = FastAPI(
     title="GodHand Pro",
     description="统一智能命令与GUI自动化系统 v3.0",
     version="3.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=_JSONResponse
 )
 
 # CORS
@@ -429,8 +480,12 @@ app.mount("/static", StaticFiles(directory=str(static_dir)), name="static")
 
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request):
-    """主页"""
-    return templates.TemplateResponse("index.html", {"request": request})
+    """主页：浏览器带上一致的 ETag 时直接返回 304"""
+    etag = app.state.index_etag
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=60"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(app.state.index_body, headers=headers)
 
 
 @app.post("/api/execute", response_model=ExecuteResponse)
@@ -447,7 +502,8 @@ async def execute_command(request: ExecuteRequest):
             {'result': result}
         )
     
-    return ExecuteResponse(**result)
+    # result 的字段与 ExecuteResponse 一致，直接序列化，不再构造模型再转回 dict
+    return _JSONResponse(content=result)
 
 
 @app.post("/api/parse")
@@ -475,33 +531,19 @@ async def chat(request: ExecuteRequest):
     
     # 生成回复
     if intent.confidence < 0.3:
-        reply = f"🤔 我不太理解 '{request.command}'\n\n试试这些:\n"
-        reply += "• 打开记事本 输入Hello World\n"
-        reply += "• 打开计算器\n"
-        reply += "• 搜索Python教程\n"
-        reply += "• 截图\n"
-        reply += "• 点击开始菜单"
+        reply = f"🤔 我不太理解 '{request.command}'\n\n试试这些:\n{_CHAT_EXAMPLES}"
     else:
-        reply = f"✅ 我理解你的指令！\n\n"
-        reply += f"**意图**: {intent.category.value} (置信度: {intent.confidence:.0%})\n"
-        reply += f"**建议模式**: {intent.suggested_mode.value}\n\n"
-        reply += f"包含 {len(actions)} 个动作:\n"
-        
-        for i, action in enumerate(actions, 1):
-            emoji = {
-                'open_app': '📱',
-                'type_text': '⌨️',
-                'press_key': '🔘',
-                'hotkey': '⌨️',
-                'click': '🖱️',
-                'wait': '⏱️',
-                'search': '🔍',
-                'file': '📁',
-                'system': '⚙️',
-                'gui': '👁️',
-                'unknown': '❓'
-            }.get(action.type.value, '▶️')
-            reply += f"{i}. {emoji} {action.description}\n"
+        parts = [
+            "✅ 我理解你的指令！\n\n",
+            f"**意图**: {intent.category.value} (置信度: {intent.confidence:.0%})\n",
+            f"**建议模式**: {intent.suggested_mode.value}\n\n",
+            f"包含 {len(actions)} 个动作:\n",
+        ]
+        parts.extend(
+            f"{i}. {_ACTION_EMOJI.get(action.type.value, '▶️')} {action.description}\n"
+            for i, action in enumerate(actions, 1)
+        )
+        reply = "".join(parts)
     
     if request.session_id:
         session_mgr.add_message(request.session_id, "user", request.command)
@@ -518,6 +560,15 @@ async def chat(request: ExecuteRequest):
     }
 
 
+if HAS_ORJSON:
+    async def _send_json(websocket: WebSocket, payload: Dict):
+        """用 orjson 编码后发送一帧 JSON"""
+        await websocket.send_text(orjson.dumps(payload).decode('utf-8'))
+else:
+    async def _send_json(websocket: WebSocket, payload: Dict):
+        await websocket.send_json(payload)
+
+
 @app.websocket("/ws/{session_id}")
 async def websocket_endpoint(websocket: WebSocket, session_id: str):
     """WebSocket 实时通信"""
@@ -525,7 +576,7 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
     
     if not session_mgr.get_session(session_id):
         session_id = session_mgr.create_session()
-        await websocket.send_json({
+        await _send_json(websocket, {
             "type": "system",
             "content": f"✨ 新会话已创建: {session_id[:12]}...",
             "session_id": session_id
@@ -541,7 +592,7 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
                 continue
             
             # 发送思考中
-            await websocket.send_json({
+            await _send_json(websocket, {
                 "type": "thinking",
                 "content": "🤔 正在理解指令..."
             })
@@ -551,15 +602,15 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
             
             # 检查是否全部无法解析
             if intent.confidence < 0.3:
-                await websocket.send_json({
+                await _send_json(websocket, {
                     "type": "error",
                     "content": f"❌ 无法理解: {user_input}\n\n试试:\n• 打开记事本 输入123\n• 打开计算器\n• 搜索Python教程"
                 })
-                await websocket.send_json({"type": "done"})
+                await _send_json(websocket, {"type": "done"})
                 continue
             
             # 发送解析结果
-            await websocket.send_json({
+            await _send_json(websocket, {
                 "type": "parsed",
                 "content": f"📋 解析为 {len(actions)} 个动作 (意图: {intent.category.value})",
                 "intent": {
@@ -574,11 +625,6 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
                 if action.type.value == 'unknown':
                     continue
                 
-                await websocket.send_json({
-                    "type": "executing",
-                    "content": f"⚡ 执行: {action.description}"
-                })
-                
                 # 执行
                 try:
                     loop = asyncio.get_event_loop()
@@ -588,9 +634,10 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
                 except Exception as e:
                     result = {'success': False, 'error': str(e)}
                 
-                # 发送结果
-                await websocket.send_json({
-                    "type": "result",
+                # 动作说明和结果合成一帧发送（动作列表已随 parsed 帧下发）
+                await _send_json(websocket, {
+                    "type": "action",
+                    "content": f"⚡ 执行: {action.description}",
                     "success": result.get('success', False),
                     "action": action.to_dict(),
                     "output": result.get('output', ''),
@@ -598,7 +645,7 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
                 })
             
             # 完成
-            await websocket.send_json({
+            await _send_json(websocket, {
                 "type": "done",
                 "content": "✅ 执行完成"
             })
@@ -608,7 +655,7 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
     except Exception as e:
         logger.error(f"[WebSocket] 错误: {e}")
         try:
-            await websocket.send_json({
+            await _send_json(websocket, {
                 "type": "error",
                 "content": f"服务器错误: {str(e)}"
             })
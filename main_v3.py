@@ -28,21 +28,30 @@ import subprocess
 import shlex
 import base64
 import io
+import re
+import secrets
+import hashlib
+import time
+from urllib.parse import quote
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Optional, Any
-from dataclasses import dataclass, asdict
+from typing import List, Dict, Optional, Any, Deque
+from dataclasses import dataclass, field, asdict
+from collections import OrderedDict, deque
 from enum import Enum
+from concurrent.futures import ThreadPoolExecutor
 
 # 添加核心模块路径
 sys.path.insert(0, str(Path(__file__).parent))
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Request, File, UploadFile
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from PIL import Image
+import pyautogui
+import pyperclip
 
 # 导入核心模块
 from core import (
@@ -54,6 +63,9 @@ from core import (
     VoiceController, VoiceState,
     CloudSync, SyncStatus
 )
+from core.task_planner import PlanningContext
+from core.common import HAS_ORJSON, DATACLASS_SLOTS, read_config_file
+from core.smart_parser_v2 import open_in_edge
 
 print("[GodHand v3.0] 正在启动宇宙级自动化系统...")
 print("[GodHand v3.0] The Universe's #1 GUI Automation System")
@@ -78,24 +90,36 @@ class VisualRequest(BaseModel):
     description: str
     screenshot: Optional[str] = None  # base64 encoded image
 
-class ChatMessage(BaseModel):
+# 会话数据只在服务内部使用，不经过请求校验，用普通 dataclass 避免 pydantic 开销
+
+# 每个会话保留的最近消息数
+MAX_SESSION_MESSAGES = 200
+
+@dataclass(**DATACLASS_SLOTS)
+class ChatMessage:
     """聊天消息"""
     role: str
     content: str
     timestamp: str
     command_result: Optional[Dict] = None
 
-class Session(BaseModel):
+@dataclass(**DATACLASS_SLOTS)
+class Session:
     """会话"""
     id: str
     created_at: str
-    messages: List[ChatMessage] = []
-    history: List[Dict] = []
+    messages: Deque[ChatMessage] = field(
+        default_factory=lambda: deque(maxlen=MAX_SESSION_MESSAGES))
+    history: List[Dict] = field(default_factory=list)
 
 # ============================================================================
 # GodHand v3.0 核心
 # ============================================================================
 
+# auto 模式下出现这些词时使用视觉模式，一次扫描完成判断
+_VISUAL_KEYWORDS = ('点击', '按钮', '输入框', '图标', '右上角', '左上角')
+_RE_VISUAL_KEYWORDS = re.compile('|'.join(map(re.escape, _VISUAL_KEYWORDS)))
+
 class GodHandCore:
     """
     GodHand v3.0 核心 - 世界级的智能自动化引擎
@@ -151,6 +175,16 @@ class GodHandCore:
         # 当前截图缓存
         self._current_screenshot: Optional[Image.Image] = None
 
+        # 计划步骤的动作类型 -> 处理函数
+        self._action_dispatch = {
+            'open_app': self._do_open_app,
+            'type_text': self._do_type_text,
+            'press_key': self._do_press_key,
+            'click': self._do_click,
+            'screenshot': self._do_screenshot,
+            'search': self._do_search,
+        }
+
         print("[Core] [emoji] 宇宙级初始化完成!")
 
     def _register_ai_skills(self):
@@ -192,8 +226,7 @@ class GodHandCore:
 
         if path and os.path.exists(path):
             try:
-                with open(path, 'r', encoding='utf-8') as f:
-                    default.update(json.load(f))
+                default.update(read_config_file(path))
             except Exception as e:
                 print(f"[Warn] 配置加载失败: {e}")
 
@@ -202,7 +235,6 @@ class GodHandCore:
     def take_screenshot(self) -> Image.Image:
         """截取屏幕"""
         try:
-            import pyautogui
             screenshot = pyautogui.screenshot()
             self._current_screenshot = screenshot
             return screenshot
@@ -228,14 +260,17 @@ class GodHandCore:
                 'error': '无法获取屏幕截图'
             }
 
+        # 检测和定位共用一份转换好的图像数组
+        img = self.visual_engine.to_bgr(screenshot)
+
         # 1. 检测屏幕元素
         print(f"[Vision] 检测屏幕元素...")
-        elements = self.visual_engine.detect_elements(screenshot)
+        elements = self.visual_engine.detect_elements(img)
         print(f"[Vision] 检测到 {len(elements)} 个元素")
 
         # 2. 定位目标元素
         print(f"[Vision] 定位: {instruction}")
-        target = self.visual_engine.locate_element(instruction, screenshot)
+        target = self.visual_engine.locate_element(instruction, img)
 
         if target:
             print(f"[Vision] 找到目标: {target.description} at ({target.x}, {target.y})")
@@ -281,8 +316,6 @@ class GodHandCore:
         print(f"[Visual] 目标位置: ({x}, {y}), 元素: {element.get('description', 'unknown')}")
 
         try:
-            import pyautogui
-
             # 根据指令类型执行不同动作
             if '点击' in instruction or '按' in instruction:
                 pyautogui.click(x, y)
@@ -298,7 +331,6 @@ class GodHandCore:
                 # 提取要输入的文本（简化处理）
                 text = instruction.split('输入')[-1].strip() if '输入' in instruction else ''
                 if text:
-                    import pyperclip
                     pyperclip.copy(text)
                     pyautogui.hotkey('ctrl', 'v')
                 return {
@@ -327,8 +359,6 @@ class GodHandCore:
         规划并执行任务
         """
         # 1. 创建规划上下文
-        from core.task_planner import PlanningContext
-
         # 获取当前屏幕信息
         screenshot = self.take_screenshot()
         elements = []
@@ -360,7 +390,6 @@ class GodHandCore:
                     'result': action_result
                 })
             elif step.type == StepType.WAIT:
-                import time
                 wait_time = step.params.get('seconds', 1.0)
                 time.sleep(wait_time)
                 results.append({
@@ -378,62 +407,60 @@ class GodHandCore:
     def _execute_step_action(self, step: Step) -> Dict:
         """执行步骤中的动作"""
         params = step.params
-        action_type = params.get('action', '')
+        handler = self._action_dispatch.get(params.get('action', ''))
+        if handler is None:
+            return {'success': False, 'error': f"未知动作: {params.get('action', '')}"}
 
         try:
-            if action_type == 'open_app':
-                app_name = params.get('app_name', '')
-                cmd = self._resolve_app_command(app_name)
-                subprocess.Popen(cmd, shell=True)
-                return {'success': True, 'output': f'打开 {app_name}'}
-
-            elif action_type == 'type_text':
-                text = params.get('text', '')
-                import pyautogui
-                import pyperclip
-                pyperclip.copy(text)
-                pyautogui.hotkey('ctrl', 'v')
-                return {'success': True, 'output': f'输入 {text[:20]}...'}
-
-            elif action_type == 'press_key':
-                key = params.get('key', '')
-                import pyautogui
-                pyautogui.press(key)
-                return {'success': True, 'output': f'按键 {key}'}
-
-            elif action_type == 'click':
-                # 如果有坐标
-                x = params.get('x')
-                y = params.get('y')
-                if x is not None and y is not None:
-                    import pyautogui
-                    pyautogui.click(x, y)
-                    return {'success': True, 'output': f'点击 ({x}, {y})'}
-                else:
-                    # 使用视觉定位
-                    description = params.get('description', '')
-                    return self.execute_visual_action(f"点击{description}")
-
-            elif action_type == 'screenshot':
-                screenshot = self.take_screenshot()
-                filename = f"screenshot_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-                screenshot.save(filename)
-                return {'success': True, 'output': f'截图保存到 {filename}'}
-
-            elif action_type == 'search':
-                query = params.get('query', '')
-                import urllib.parse
-                encoded = urllib.parse.quote(query)
-                url = f"https://www.bing.com/search?q={encoded}"
-                subprocess.Popen(f'start msedge "{url}"', shell=True)
-                return {'success': True, 'output': f'搜索 {query}'}
-
-            else:
-                return {'success': False, 'error': f'未知动作: {action_type}'}
-
+            return handler(params)
         except Exception as e:
             return {'success': False, 'error': str(e)}
 
+    def _do_open_app(self, params: Dict) -> Dict:
+        app_name = params.get('app_name', '')
+        cmd = self._resolve_app_command(app_name)
+        try:
+            # ShellExecute 直接启动，能解析 App Paths（如 msedge、winword）和 ms-settings: 协议
+            os.startfile(cmd)
+        except (AttributeError, OSError):
+            # 非 Windows 或带参数的命令行，交给 shell 解析
+            subprocess.Popen(cmd, shell=True)
+        return {'success': True, 'output': f'打开 {app_name}'}
+
+    def _do_type_text(self, params: Dict) -> Dict:
+        text = params.get('text', '')
+        pyperclip.copy(text)
+        pyautogui.hotkey('ctrl', 'v')
+        return {'success': True, 'output': f'输入 {text[:20]}...'}
+
+    def _do_press_key(self, params: Dict) -> Dict:
+        key = params.get('key', '')
+        pyautogui.press(key)
+        return {'success': True, 'output': f'按键 {key}'}
+
+    def _do_click(self, params: Dict) -> Dict:
+        # 如果有坐标
+        x = params.get('x')
+        y = params.get('y')
+        if x is not None and y is not None:
+            pyautogui.click(x, y)
+            return {'success': True, 'output': f'点击 ({x}, {y})'}
+        # 使用视觉定位
+        description = params.get('description', '')
+        return self.execute_visual_action(f"点击{description}")
+
+    def _do_screenshot(self, params: Dict) -> Dict:
+        screenshot = self.take_screenshot()
+        filename = f"screenshot_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
+        screenshot.save(filename)
+        return {'success': True, 'output': f'截图保存到 {filename}'}
+
+    def _do_search(self, params: Dict) -> Dict:
+        query = params.get('query', '')
+        url = f"https://www.bing.com/search?q={quote(query)}"
+        open_in_edge(url)
+        return {'success': True, 'output': f'搜索 {query}'}
+
     def _resolve_app_command(self, app_name: str) -> str:
         """解析应用名称到命令"""
         app_map = {
@@ -474,8 +501,7 @@ class GodHandCore:
         # 自动选择模式
         if mode == "auto":
             # 如果包含视觉关键词，使用视觉模式
-            visual_keywords = ['点击', '按钮', '输入框', '图标', '右上角', '左上角']
-            if any(kw in text for kw in visual_keywords):
+            if _RE_VISUAL_KEYWORDS.search(text):
                 mode = "visual"
             else:
                 # 使用命令模式处理所有指令（包括复合指令）
@@ -512,30 +538,44 @@ class SessionManager:
     """会话管理器"""
 
     def __init__(self):
-        self.sessions: Dict[str, Session] = {}
+        # 按最近使用排序，超出上限时淘汰最久未用的会话
+        self.sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self.max_sessions = 1000
 
     def create_session(self) -> str:
         """创建新会话"""
-        session_id = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
+        # 随机 ID：按毫秒时间生成的 ID 在同一毫秒内创建两个会话时会互相覆盖
+        session_id = secrets.token_hex(8)
+        if len(self.sessions) >= self.max_sessions:
+            self.sessions.popitem(last=False)
         self.sessions[session_id] = Session(
             id=session_id,
-            created_at=datetime.now().isoformat(),
-            messages=[]
+            created_at=datetime.now().isoformat()
         )
         return session_id
 
     def get_session(self, session_id: str) -> Optional[Session]:
         """获取会话"""
-        return self.sessions.get(session_id)
+        session = self.sessions.get(session_id)
+        if session is not None:
+            self.sessions.move_to_end(session_id)
+        return session
 
 # ============================================================================
 # FastAPI 应用
 # ============================================================================
 
+# 安装了 orjson 时用它序列化所有 JSON 响应
+if HAS_ORJSON:
+    from fastapi.responses import ORJSONResponse as _JSONResponse
+else:
+    _JSONResponse = JSONResponse
+
 app = FastAPI(
     title="GodHand v3.0",
     description="世界级的智能命令与GUI自动化系统 - 视觉理解 + 任务规划",
-    version="3.0.0-alpha"
+    version="3.0.0-alpha",
+    default_response_class=_JSONResponse
 )
 
 # CORS
@@ -557,19 +597,36 @@ config_path = str(Path(__file__).parent / "config.json")
 godhand = GodHandCore(config_path=config_path)
 session_mgr = SessionManager()
 
+# 阻塞调用放到线程池，不占用事件循环
+# 键鼠只有一套：操作键鼠的动作单线程排队执行，避免多个会话的点击/输入交错
+_GUI_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix="godhand-gui")
+# 截图、元素检测、任务规划等不操作键鼠的阻塞任务
+_WORK_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="godhand-work")
+
+
+async def _run_in(pool: ThreadPoolExecutor, func, *args):
+    """在指定线程池中执行阻塞函数"""
+    return await asyncio.get_running_loop().run_in_executor(pool, func, *args)
+
 # ============================================================================
 # API 路由
 # ============================================================================
 
 @app.get("/", response_class=HTMLResponse)
-async def index():
-    """主页"""
-    return HTMLResponse(content=get_html())
+async def index(request: Request):
+    """主页：页面内容不变，浏览器带上一致的 ETag 时直接返回 304"""
+    headers = {"ETag": _INDEX_ETAG, "Cache-Control": "public, max-age=60"}
+    if request.headers.get("if-none-match") == _INDEX_ETAG:
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(content=_INDEX_HTML, headers=headers)
 
 @app.post("/api/execute")
 async def execute_command(request: CommandRequest):
     """执行命令 API - v3.0 智能版"""
-    result = godhand.process(request.command, mode=request.mode)
+    result = await _run_in(_GUI_POOL, godhand.process, request.command, request.mode)
+
+    # 本次请求的消息和响应共用一个时间戳
+    timestamp = datetime.now().isoformat()
 
     # 记录到会话
     if request.session_id:
@@ -578,12 +635,12 @@ async def execute_command(request: CommandRequest):
             session.messages.append(ChatMessage(
                 role="user",
                 content=request.command,
-                timestamp=datetime.now().isoformat()
+                timestamp=timestamp
             ))
             session.messages.append(ChatMessage(
                 role="assistant",
                 content=json.dumps(result, ensure_ascii=False),
-                timestamp=datetime.now().isoformat(),
+                timestamp=timestamp,
                 command_result=result
             ))
 
@@ -592,20 +649,18 @@ async def execute_command(request: CommandRequest):
         "command": request.command,
         "mode": request.mode,
         "result": result,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": timestamp
     }
 
 @app.post("/api/plan")
 async def create_plan(request: PlanRequest):
     """创建执行计划"""
-    from core.task_planner import PlanningContext
-
     context = PlanningContext(
         instruction=request.instruction,
         **(request.context or {})
     )
 
-    plan = godhand.task_planner.plan(request.instruction, context)
+    plan = await _run_in(_WORK_POOL, godhand.task_planner.plan, request.instruction, context)
 
     return {
         "success": True,
@@ -613,15 +668,13 @@ async def create_plan(request: PlanRequest):
         "timestamp": datetime.now().isoformat()
     }
 
-@app.post("/api/detect")
-async def detect_elements(request: VisualRequest):
-    """检测屏幕元素"""
+def _detect_elements(encoded: Optional[str]) -> Dict:
+    """解码上传的截图（或实时截图）并检测元素"""
     screenshot = None
 
-    if request.screenshot:
+    if encoded:
         # 从 base64 解码
-        import base64
-        img_data = base64.b64decode(request.screenshot.split(',')[-1])
+        img_data = base64.b64decode(encoded.split(',')[-1])
         screenshot = Image.open(io.BytesIO(img_data))
     else:
         # 实时截图
@@ -641,23 +694,36 @@ async def detect_elements(request: VisualRequest):
             "error": "无法获取屏幕截图"
         }
 
+@app.post("/api/detect")
+async def detect_elements(request: VisualRequest):
+    """检测屏幕元素"""
+    return await _run_in(_WORK_POOL, _detect_elements, request.screenshot)
+
 @app.post("/api/visual")
 async def visual_action(request: VisualRequest):
     """执行视觉动作"""
-    result = godhand.execute_visual_action(request.description)
+    result = await _run_in(_GUI_POOL, godhand.execute_visual_action, request.description)
     return result
 
+# 截图预览用 JPEG：整屏 PNG 编码慢且体积是数 MB
+SCREENSHOT_JPEG_QUALITY = 80
+
+def _screenshot_jpeg() -> Optional[bytes]:
+    """截图并编码为 JPEG"""
+    screenshot = godhand.take_screenshot()
+    if not screenshot:
+        return None
+    img_byte_arr = io.BytesIO()
+    screenshot.convert('RGB').save(img_byte_arr, format='JPEG',
+                                   quality=SCREENSHOT_JPEG_QUALITY)
+    return img_byte_arr.getvalue()
+
 @app.get("/api/screenshot")
 async def get_screenshot():
     """获取屏幕截图"""
-    screenshot = godhand.take_screenshot()
-    if screenshot:
-        # 转换为 bytes
-        img_byte_arr = io.BytesIO()
-        screenshot.save(img_byte_arr, format='PNG')
-        img_byte_arr.seek(0)
-
-        return StreamingResponse(img_byte_arr, media_type="image/png")
+    image_bytes = await _run_in(_WORK_POOL, _screenshot_jpeg)
+    if image_bytes:
+        return Response(content=image_bytes, media_type="image/jpeg")
     else:
         return JSONResponse(
             content={"error": "截图失败"},
@@ -673,7 +739,7 @@ async def new_session():
 @app.get("/api/health")
 async def health_check():
     """健康检查"""
-    screenshot = godhand.take_screenshot()
+    screenshot = await _run_in(_WORK_POOL, godhand.take_screenshot)
     return {
         "status": "ok",
         "version": "3.0.0-alpha",
@@ -715,7 +781,7 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
             })
 
             # 处理
-            result = godhand.process(user_input, mode=mode)
+            result = await _run_in(_GUI_POOL, godhand.process, user_input, mode)
 
             # 发送结果
             await websocket.send_json({
@@ -1166,6 +1232,10 @@ def get_html() -> str:
 </body>
 </html>'''
 
+# 主页是静态内容，启动时生成一次
+_INDEX_HTML = get_html()
+_INDEX_ETAG = '"%s"' % hashlib.md5(_INDEX_HTML.encode('utf-8')).hexdigest()
+
 if __name__ == "__main__":
     import uvicorn
     print("=" * 70)
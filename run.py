@@ -42,10 +42,9 @@ def run_command(command: str):
     print(f"{'='*60}")
 
     executor = ActionExecutor()
-    results = executor.execute_batch(actions)
+    results, success_count = executor.execute_batch(actions)
 
     # 结果
-    success_count = sum(1 for r in results if r.get('success'))
     print(f"\n{'='*60}")
     print(f"[完成] {success_count}/{len(results)} 个动作成功")
     print(f"{'='*60}")
@@ -8,6 +8,7 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from main_cli import SimpleParser, ActionExecutor, ActionType
+from main_cli import _PARSE_RULES, _RULE_RES, _KEYWORD_SCANNER
 
 def test_parser():
     """Test parser with various commands"""
@@ -51,5 +52,98 @@ def test_parser():
     print("Parser test complete")
     print("=" * 60)
 
+def test_parser_trims_arguments():
+    """Quotes and surrounding whitespace are stripped by the rule regexes"""
+    parser = SimpleParser()
+
+    cases = [
+        ('输入 "quoted text"', ActionType.TYPE, 'text', 'quoted text'),
+        ("打字 '单引号'", ActionType.TYPE, 'text', '单引号'),
+        ('输入 " padded "', ActionType.TYPE, 'text', ' padded '),
+        ('  输入   空格前后  ', ActionType.TYPE, 'text', '空格前后'),
+        ('创建文件 "My File.txt"', ActionType.FILE_CREATE, 'path', 'My File.txt'),
+        ('新建文件夹 my_folder', ActionType.DIR_CREATE, 'path', 'my_folder'),
+        ('创建目录 "a b"', ActionType.DIR_CREATE, 'path', 'a b'),
+        ("移除文件 'x.log'", ActionType.FILE_DELETE, 'path', 'x.log'),
+        ('点击图片   spaced.png', ActionType.IMAGE_CLICK, 'image', 'spaced.png'),
+        ('等待图片  x.png', ActionType.WAIT_FOR_IMAGE, 'image', 'x.png'),
+    ]
+
+    for cmd, action_type, key, expected in cases:
+        actions = parser.parse(cmd)
+        assert len(actions) == 1, cmd
+        assert actions[0].type == action_type, cmd
+        assert actions[0].params[key] == expected, (cmd, actions[0].params)
+
+    # 只有引号、没有内容的参数不能把引号当成参数
+    for cmd in ('输入""', "打字 ''", '新建文件夹 ""', '创建文件 ""', "删除文件 ''"):
+        assert parser.parse(cmd) == [], (cmd, parser.parse(cmd))
+
+
+def test_parser_prefix_respects_rule_priority():
+    """A leading verb must not override a higher-priority rule found later in the input"""
+    parser = SimpleParser()
+
+    cases = [
+        ('按钮点击 100,200', ActionType.CLICK, {'x': 100, 'y': 200}),
+        ('按照说明打开记事本', ActionType.OPEN_APP, {'app': 'notepad.exe'}),
+        ('循环 3次 截图', ActionType.SCREENSHOT, {}),
+        ('请循环 3次 截图', ActionType.SCREENSHOT, {}),
+        ('按 enter', ActionType.PRESS_KEY, {'key': 'enter'}),
+    ]
+
+    for cmd, action_type, params in cases:
+        actions = parser.parse(cmd)
+        assert len(actions) == 1, cmd
+        assert actions[0].type == action_type, (cmd, actions[0])
+        assert actions[0].params == params, (cmd, actions[0].params)
+
+
+def test_rule_keywords_cover_regex():
+    """Every input a rule's regex accepts must also produce a keyword hit for that rule"""
+    samples = {
+        'open_app': '打开记事本',
+        'click': '点击 100,200',
+        'double_click': '双击',
+        'right_click': '右键',
+        'type': '输入 hello',
+        'press_key': '按 enter',
+        'hotkey': '快捷键 ctrl+c',
+        'wait': '等待 3',
+        'screenshot': '截图',
+        'move': '移到 100,200',
+        'search': 'Google python',
+        'dir_create': '新建文件夹 test',
+        'file_create': '创建文件 a.txt',
+        'file_delete': '删除文件 a.txt',
+        'browser_open': '访问 https://example.com',
+        'close_app': '关掉 notepad',
+        'copy': '拷贝',
+        'paste': '粘贴',
+        'select_all': '全选',
+        'get_position': '显示鼠标位置',
+        'image_click': '找图 a.PNG',
+        'loop': '重复 3次 截图',
+        'wait_for_image': '等图片 a.png',
+        'activate_window': '切换到 记事本',
+        'list_windows': '列出窗口',
+        'minimize_window': '最小化',
+        'maximize_window': '最大化',
+        'get_screen_size': '获取屏幕分辨率',
+        'get_pixel_color': '查看像素颜色 10,20',
+        'random_click': '随便点',
+        'beep': 'BEEP',
+        'notify': '提醒 喝水',
+    }
+    assert set(samples) == {rule.name for rule in _PARSE_RULES}
+
+    for name, sample in samples.items():
+        assert _RULE_RES[name].search(sample), (name, sample)
+        assert name in _KEYWORD_SCANNER.scan(sample), (name, sample)
+
+
 if __name__ == "__main__":
     test_parser()
+    test_parser_trims_arguments()
+    test_parser_prefix_respects_rule_priority()
+    test_rule_keywords_cover_regex()
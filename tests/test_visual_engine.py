@@ -7,6 +7,7 @@ VisualEngine 测试套件
 
 import unittest
 import sys
+from unittest.mock import patch
 from pathlib import Path
 from PIL import Image
 import numpy as np
@@ -93,6 +94,30 @@ class TestVisualEngine(unittest.TestCase):
         self.assertIsInstance(elements, list)
         self.assertLess(len(elements), 50)  # 合理的上限
 
+    def test_detect_elements_reuses_recent_result(self):
+        """测试同一画面在有效期内复用检测结果"""
+        engine = VisualEngine(use_ocr=False, use_ml=False)
+        img = Image.new('RGB', (800, 600), color='gray')
+        first = engine.detect_elements(img)
+
+        with patch.object(engine, '_detect_with_cv') as detect:
+            second = engine.detect_elements(img.copy())
+            detect.assert_not_called()
+        self.assertEqual(first, second)
+
+        # 画面变化后重新检测
+        with patch.object(engine, '_detect_with_cv', return_value=[]) as detect:
+            engine.detect_elements(Image.new('RGB', (800, 600), color='white'))
+            detect.assert_called_once()
+
+    def test_to_bgr(self):
+        """测试 PIL 截图转为 BGR 数组，数组输入原样返回"""
+        img = Image.new('RGB', (4, 2), color=(255, 0, 0))
+        bgr = VisualEngine.to_bgr(img)
+        self.assertEqual(bgr.shape, (2, 4, 3))
+        self.assertEqual(tuple(bgr[0, 0]), (0, 0, 255))
+        self.assertIs(VisualEngine.to_bgr(bgr), bgr)
+
     def test_scene_context_creation(self):
         """测试场景上下文"""
         context = SceneContext(
@@ -198,6 +223,30 @@ class TestElementFiltering(unittest.TestCase):
         # 应该过滤掉重叠的低置信度元素
         self.assertLessEqual(len(filtered), len(elements))
 
+    def test_filter_matches_pairwise_iou(self):
+        """测试批量 IoU 过滤与逐对 _calculate_iou 的结果一致"""
+        rng = np.random.default_rng(0)
+        elements = [
+            UIElement(ElementType.BUTTON, int(x), int(y), int(w), int(h), float(c))
+            for x, y, w, h, c in zip(rng.integers(0, 300, 200), rng.integers(0, 300, 200),
+                                     rng.integers(5, 80, 200), rng.integers(5, 80, 200),
+                                     rng.random(200))
+        ]
+
+        expected = []
+        for elem in elements:
+            for i, existing in enumerate(expected):
+                if self.engine._calculate_iou(elem.bbox, existing.bbox) > 0.5:
+                    if elem.confidence > existing.confidence:
+                        del expected[i]
+                        expected.append(elem)
+                    break
+            else:
+                expected.append(elem)
+        expected.sort(key=lambda e: e.confidence, reverse=True)
+
+        self.assertEqual(self.engine._filter_and_sort(elements), expected)
+
     def test_sort_by_confidence(self):
         """测试按置信度排序"""
         elements = [
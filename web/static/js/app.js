@@ -205,6 +205,12 @@ class GodHandApp {
                 this.addResultCard(data.success, output);
                 break;
             }
+            case 'action': {
+                this.addAssistantMessage(data.content);
+                const output = data.output || data.error || '完成';
+                this.addResultCard(data.success, output);
+                break;
+            }
             case 'progress':
                 this.updateProgress(data);
                 break;
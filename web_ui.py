@@ -138,6 +138,7 @@ class GodHandWebUI:
                 data = request.json
                 for key, value in data.items():
                     self.config.set(key, value)
+                self.config.flush()
                 return jsonify({'success': True})
 
         @self.app.route('/api/memory/search')
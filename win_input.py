@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Windows 原生输入 - 通过 user32.SendInput 批量发送键盘/鼠标事件
+
+一组按键（按下 + 抬起）打包成一个 INPUT 数组，只调用一次 SendInput，
+没有 pyautogui 每个事件之间的人为停顿。
+非 Windows 平台或遇到无法映射的按键时各函数返回 False，由调用方退回 pyautogui。
+每次发送前沿用 pyautogui 的角落安全检查（pyautogui.FAILSAFE），鼠标移到屏幕角落时
+抛出 pyautogui.FailSafeException。
+"""
+
+import sys
+import time
+import ctypes
+from typing import Iterable, List, Optional
+
+AVAILABLE = sys.platform == 'win32'
+
+if AVAILABLE:
+    from ctypes import wintypes
+
+    _user32 = ctypes.WinDLL('user32', use_last_error=True)
+
+    _ULONG_PTR = wintypes.WPARAM
+
+    class _MOUSEINPUT(ctypes.Structure):
+        _fields_ = [
+            ('dx', wintypes.LONG),
+            ('dy', wintypes.LONG),
+            ('mouseData', wintypes.DWORD),
+            ('dwFlags', wintypes.DWORD),
+            ('time', wintypes.DWORD),
+            ('dwExtraInfo', _ULONG_PTR),
+        ]
+
+    class _KEYBDINPUT(ctypes.Structure):
+        _fields_ = [
+            ('wVk', wintypes.WORD),
+            ('wScan', wintypes.WORD),
+            ('dwFlags', wintypes.DWORD),
+            ('time', wintypes.DWORD),
+            ('dwExtraInfo', _ULONG_PTR),
+        ]
+
+    class _HARDWAREINPUT(ctypes.Structure):
+        _fields_ = [
+            ('uMsg', wintypes.DWORD),
+            ('wParamL', wintypes.WORD),
+            ('wParamH', wintypes.WORD),
+        ]
+
+    class _INPUTUNION(ctypes.Union):
+        _fields_ = [('mi', _MOUSEINPUT), ('ki', _KEYBDINPUT), ('hi', _HARDWAREINPUT)]
+
+    class _INPUT(ctypes.Structure):
+        _anonymous_ = ('u',)
+        _fields_ = [('type', wintypes.DWORD), ('u', _INPUTUNION)]
+
+    _user32.SendInput.argtypes = (wintypes.UINT, ctypes.POINTER(_INPUT), ctypes.c_int)
+    _user32.SendInput.restype = wintypes.UINT
+
+    # SendInput 绕过了 pyautogui，安全检查要单独做
+    try:
+        import pyautogui as _pyautogui
+    except ImportError:
+        _pyautogui = None
+
+_INPUT_MOUSE = 0
+_INPUT_KEYBOARD = 1
+
+_KEYEVENTF_EXTENDEDKEY = 0x0001
+_KEYEVENTF_KEYUP = 0x0002
+_KEYEVENTF_UNICODE = 0x0004
+
+_MOUSEEVENTF_MOVE = 0x0001
+_MOUSEEVENTF_VIRTUALDESK = 0x4000
+_MOUSEEVENTF_ABSOLUTE = 0x8000
+
+# GetSystemMetrics：虚拟桌面（所有显示器）的左上角与尺寸
+_SM_XVIRTUALSCREEN = 76
+_SM_YVIRTUALSCREEN = 77
+_SM_CXVIRTUALSCREEN = 78
+_SM_CYVIRTUALSCREEN = 79
+_MOUSE_BUTTON_FLAGS = {
+    'left': (0x0002, 0x0004),
+    'right': (0x0008, 0x0010),
+    'middle': (0x0020, 0x0040),
+}
+
+# pyautogui 按键名 -> 虚拟键码
+VK_CODES = {
+    'ctrl': 0x11, 'control': 0x11, 'ctrlleft': 0xA2, 'ctrlright': 0xA3,
+    'shift': 0x10, 'shiftleft': 0xA0, 'shiftright': 0xA1,
+    'alt': 0x12, 'altleft': 0xA4, 'altright': 0xA5,
+    'win': 0x5B, 'winleft': 0x5B, 'winright': 0x5C,
+    'enter': 0x0D, 'return': 0x0D,
+    'esc': 0x1B, 'escape': 0x1B,
+    'tab': 0x09,
+    'space': 0x20,
+    'backspace': 0x08,
+    'delete': 0x2E, 'del': 0x2E,
+    'insert': 0x2D,
+    'home': 0x24, 'end': 0x23,
+    'pageup': 0x21, 'pgup': 0x21, 'pagedown': 0x22, 'pgdn': 0x22,
+    'up': 0x26, 'down': 0x28, 'left': 0x25, 'right': 0x27,
+    'capslock': 0x14,
+    'printscreen': 0x2C, 'prtsc': 0x2C,
+}
+VK_CODES.update({f'f{i}': 0x6F + i for i in range(1, 25)})
+VK_CODES.update({c: ord(c.upper()) for c in 'abcdefghijklmnopqrstuvwxyz0123456789'})
+
+# 需要带 EXTENDEDKEY 标志的按键
+_EXTENDED_VKS = frozenset({
+    0x21, 0x22, 0x23, 0x24, 0x25, 0x26, 0x27, 0x28, 0x2D, 0x2E,
+    0xA3, 0xA5, 0x5B, 0x5C, 0x2C,
+})
+
+
+def _key_input(vk: int = 0, scan: int = 0, flags: int = 0):
+    item = _INPUT(type=_INPUT_KEYBOARD)
+    item.ki = _KEYBDINPUT(wVk=vk, wScan=scan, dwFlags=flags, time=0, dwExtraInfo=0)
+    return item
+
+
+def _vk_input(vk: int, key_up: bool):
+    flags = _KEYEVENTF_KEYUP if key_up else 0
+    if vk in _EXTENDED_VKS:
+        flags |= _KEYEVENTF_EXTENDEDKEY
+    return _key_input(vk=vk, flags=flags)
+
+
+def _mouse_input(flags: int, dx: int = 0, dy: int = 0):
+    item = _INPUT(type=_INPUT_MOUSE)
+    item.mi = _MOUSEINPUT(dx=dx, dy=dy, mouseData=0, dwFlags=flags, time=0, dwExtraInfo=0)
+    return item
+
+
+def _abs_move(x: int, y: int, metrics):
+    """移动到屏幕绝对坐标；坐标按虚拟桌面归一化到 0..65535，副屏上的坐标同样有效"""
+    left, top, width, height = metrics
+    dx = int((x - left) * 65535 / max(width - 1, 1))
+    dy = int((y - top) * 65535 / max(height - 1, 1))
+    return _mouse_input(
+        _MOUSEEVENTF_MOVE | _MOUSEEVENTF_VIRTUALDESK | _MOUSEEVENTF_ABSOLUTE, dx, dy)
+
+
+def _screen_metrics():
+    """虚拟桌面 (left, top, width, height)"""
+    return (
+        _user32.GetSystemMetrics(_SM_XVIRTUALSCREEN),
+        _user32.GetSystemMetrics(_SM_YVIRTUALSCREEN),
+        _user32.GetSystemMetrics(_SM_CXVIRTUALSCREEN),
+        _user32.GetSystemMetrics(_SM_CYVIRTUALSCREEN),
+    )
+
+
+def _lookup_vk(key: str) -> Optional[int]:
+    """按键名转虚拟键码；单个字符区分大小写，'A' 这类大写字母没有对应的无 Shift 键码"""
+    return VK_CODES.get(key if len(key) == 1 else key.lower())
+
+
+def _send(events: List, fail_safe: bool = True) -> bool:
+    """一次 SendInput 调用发出全部事件；发送前先做 pyautogui 的角落安全检查"""
+    if fail_safe and _pyautogui is not None:
+        _pyautogui.failSafeCheck()
+    array = (_INPUT * len(events))(*events)
+    sent = _user32.SendInput(len(events), array, ctypes.sizeof(_INPUT))
+    return sent == len(events)
+
+
+def send_keys(keys: Iterable[str]) -> bool:
+    """组合键：依次按下，再逆序抬起（如 ['ctrl', 'v']）"""
+    if not AVAILABLE:
+        return False
+    vks = []
+    for key in keys:
+        vk = _lookup_vk(key)
+        if vk is None:
+            return False
+        vks.append(vk)
+    if not vks:
+        return False
+    events = [_vk_input(vk, False) for vk in vks]
+    events += [_vk_input(vk, True) for vk in reversed(vks)]
+    return _send(events)
+
+
+def press(key: str) -> bool:
+    """单个按键；无虚拟键码的单个字符（如 '+'、大写字母）以 Unicode 事件发送"""
+    if not AVAILABLE:
+        return False
+    vk = _lookup_vk(key)
+    if vk is not None:
+        return _send([_vk_input(vk, False), _vk_input(vk, True)])
+    if len(key) == 1:
+        code = ord(key)
+        if code > 0xFFFF:
+            return False
+        return _send([
+            _key_input(scan=code, flags=_KEYEVENTF_UNICODE),
+            _key_input(scan=code, flags=_KEYEVENTF_UNICODE | _KEYEVENTF_KEYUP),
+        ])
+    return False
+
+
+def type_text(text: str) -> bool:
+    """把文字作为 Unicode 字符事件一次发出
+
+    KEYEVENTF_UNICODE 事件以 VK_PACKET 送达，不经过输入法组字，中文输入法处于
+    中文模式时 "hello" 也按原样输入；换行按回车键发送。
+    """
+    if not AVAILABLE or not text:
+        return False
+    events = []
+    enter = VK_CODES['enter']
+    for char in text.replace('\r\n', '\n'):
+        if char == '\n':
+            events += [_vk_input(enter, False), _vk_input(enter, True)]
+            continue
+        # 超出 BMP 的字符拆成 UTF-16 代理对，逐个码元发送
+        data = char.encode('utf-16-le')
+        for i in range(0, len(data), 2):
+            code = int.from_bytes(data[i:i + 2], 'little')
+            events.append(_key_input(scan=code, flags=_KEYEVENTF_UNICODE))
+            events.append(_key_input(scan=code, flags=_KEYEVENTF_UNICODE | _KEYEVENTF_KEYUP))
+    return _send(events)
+
+
+def click(x: Optional[int] = None, y: Optional[int] = None,
+          button: str = 'left', clicks: int = 1) -> bool:
+    """在 (x, y) 点击；坐标为空时在当前位置点击"""
+    if not AVAILABLE or button not in _MOUSE_BUTTON_FLAGS:
+        return False
+    down, up = _MOUSE_BUTTON_FLAGS[button]
+    events = []
+    if x is not None and y is not None:
+        events.append(_abs_move(x, y, _screen_metrics()))
+    for _ in range(clicks):
+        events.append(_mouse_input(down))
+        events.append(_mouse_input(up))
+    return _send(events)
+
+
+def drag(x1: int, y1: int, x2: int, y2: int, duration: float = 0.2,
+         steps: int = 20, button: str = 'left') -> bool:
+    """从 (x1, y1) 按住拖到 (x2, y2)：按下后沿直线分 steps 步移动，再抬起
+
+    每步之间停顿 duration / steps 秒，让目标程序收到中间的移动事件。
+    按下和每一步移动前都做安全检查，鼠标移到角落时抛出 FailSafeException 并松开按键。
+    """
+    if not AVAILABLE or button not in _MOUSE_BUTTON_FLAGS:
+        return False
+    down, up = _MOUSE_BUTTON_FLAGS[button]
+    metrics = _screen_metrics()
+    if not _send([_abs_move(x1, y1, metrics), _mouse_input(down)]):
+        return False
+    steps = max(steps, 1)
+    delay = duration / steps
+    try:
+        for i in range(1, steps + 1):
+            time.sleep(delay)
+            x = x1 + (x2 - x1) * i // steps
+            y = y1 + (y2 - y1) * i // steps
+            _send([_abs_move(x, y, metrics)])
+    finally:
+        # 中途出错（包括触发安全检查）也要抬起按键，避免鼠标停在按下状态；
+        # 抬起本身不做安全检查，否则鼠标在角落时按键永远松不开
+        released = _send([_mouse_input(up)], fail_safe=False)
+    return released